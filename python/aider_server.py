@@ -12,6 +12,11 @@ from asyncio import Event
 from concurrent.futures import ThreadPoolExecutor
 from jrpc_oo import JRPCServer
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 try:
     from .io_wrapper import IOWrapper
     from .coder_wrapper import CoderWrapper
@@ -19,9 +24,10 @@ try:
     from .chat_history import ChatHistory
     from .webapp_server import start_npm_dev_server, open_browser, cleanup_npm_process
     from .lsp_server import start_lsp_server, cleanup_lsp_process
-    from .port_utils import find_available_port
+    from .port_utils import find_available_port, reserve_port
     from .server_config import ServerConfig
     from .exceptions import ValidationError, ProcessError, WebappError, LSPError
+    from .logger import Logger
 except ImportError:
     from io_wrapper import IOWrapper
     from coder_wrapper import CoderWrapper
@@ -29,9 +35,10 @@ except ImportError:
     from chat_history import ChatHistory
     from webapp_server import start_npm_dev_server, open_browser, cleanup_npm_process
     from lsp_server import start_lsp_server, cleanup_lsp_process
-    from port_utils import find_available_port
+    from port_utils import find_available_port, reserve_port
     from server_config import ServerConfig
     from exceptions import ValidationError, ProcessError, WebappError, LSPError
+    from logger import Logger
 
 # Apply the monkey patch before importing aider modules
 CoderWrapper.apply_coder_create_patch()
@@ -41,6 +48,7 @@ from aider.main import main
 shutdown_event = None
 jrpc_server = None
 aider_thread = None
+io_wrapper = None
 cleanup_done = False
 
 def cleanup_all():
@@ -53,6 +61,10 @@ def cleanup_all():
     cleanup_done = True
     print("Performing cleanup...")
     
+    # Release aider's thread if it is waiting for a confirmation
+    if io_wrapper:
+        io_wrapper.cancel_confirmations()
+    
     # Clean up external processes first
     cleanup_npm_process()
     cleanup_lsp_process()
@@ -60,10 +72,27 @@ def cleanup_all():
 def force_exit():
     """Force exit the application"""
     cleanup_all()
+    # os._exit skips atexit, so write out any queued log records first
+    Logger.shutdown()
     os._exit(0)
 
+def reserve_lsp_port(config):
+    """Reserve the LSP port, --lsp-port or aider_port + 100 by default
+
+    If that port is taken the kernel picks a free one, rather than probing
+    the ports above it.
+    """
+    try:
+        return reserve_port(config.lsp_port or config.aider_port + 100, max_attempts=1)
+    except RuntimeError:
+        return reserve_port()
+
 async def find_ports_async(config):
-    """Find available ports concurrently"""
+    """Find available ports concurrently
+
+    The LSP port is returned as a listening socket so it stays reserved until
+    the LSP server, started later, inherits it.
+    """
     loop = asyncio.get_event_loop()
     with ThreadPoolExecutor(max_workers=2) as executor:
         # Find server port
@@ -75,15 +104,14 @@ async def find_ports_async(config):
         
         # Find LSP port if needed
         if config.is_lsp_enabled():
-            lsp_start_port = config.aider_port + 100
-            lsp_port_future = loop.run_in_executor(
+            lsp_socket_future = loop.run_in_executor(
                 executor,
-                find_available_port,
-                lsp_start_port
+                reserve_lsp_port,
+                config
             )
             server_port = await server_port_future
-            lsp_port = await lsp_port_future
-            return server_port, lsp_port
+            lsp_socket = await lsp_socket_future
+            return server_port, lsp_socket
         else:
             server_port = await server_port_future
             return server_port, None
@@ -103,8 +131,30 @@ async def wait_for_coder_init(timeout=30):
         await asyncio.sleep(0.1)  # Reduced from 0.5 to 0.1
     return True
 
-async def main_starter_async():
-    global shutdown_event, jrpc_server, aider_thread
+def get_loop_factory(event_loop):
+    """Return the event loop factory for the --loop option, None for asyncio's default"""
+    if event_loop == 'uvloop':
+        if uvloop is None:
+            print("uvloop is not installed, using the default asyncio event loop")
+            return None
+        return uvloop.new_event_loop
+    return None
+
+def enable_eager_tasks(loop):
+    """Run new tasks on loop eagerly (Python 3.12+)
+    
+    Coroutines that complete without suspending, like the webapp's fire and forget
+    sends, then finish inside create_task instead of waiting for a loop iteration.
+    An existing task factory is left in place.
+    """
+    if not hasattr(asyncio, 'eager_task_factory'):
+        print("Eager tasks need Python 3.12 or later, ignoring --eager-tasks")
+        return
+    if loop.get_task_factory() is None:
+        loop.set_task_factory(asyncio.eager_task_factory)
+
+async def main_starter_async(config=None):
+    global shutdown_event, jrpc_server, aider_thread, io_wrapper
     shutdown_event = Event()
     
     # Register cleanup function to run on exit
@@ -123,7 +173,12 @@ async def main_starter_async():
     signal.signal(signal.SIGTERM, sigint_handler)
     
     # Parse configuration from command line
-    config = ServerConfig.from_args()
+    if config is None:
+        config = ServerConfig.from_args()
+    
+    # Changes scheduling for every task on the loop, so only when asked for
+    if config.eager_tasks:
+        enable_eager_tasks(asyncio.get_running_loop())
     
     # Validate configuration
     errors = config.validate()
@@ -138,7 +193,8 @@ async def main_starter_async():
     
     # Find available ports concurrently
     try:
-        server_port, lsp_port = await find_ports_async(config)
+        server_port, lsp_socket = await find_ports_async(config)
+        lsp_port = lsp_socket.getsockname()[1] if lsp_socket else None
         config.update_actual_ports(aider_port=server_port, lsp_port=lsp_port)
         
         if config.is_lsp_enabled() and lsp_port:
@@ -217,7 +273,7 @@ async def main_starter_async():
     if config.is_lsp_enabled() and lsp_port:
         try:
             lsp_task = asyncio.create_task(
-                asyncio.to_thread(start_lsp_server, config, repo)
+                asyncio.to_thread(start_lsp_server, config, repo, lsp_socket)
             )
             tasks.append(lsp_task)
         except (ProcessError, LSPError) as e:
@@ -233,8 +289,7 @@ async def main_starter_async():
         try:
             dev_server_started = await webapp_task
             if dev_server_started:
-                # Small delay for dev server readiness
-                await asyncio.sleep(0.5)  # Reduced from 2 seconds
+                # The dev server is accepting connections once its start returns
                 # Open browser asynchronously
                 asyncio.create_task(asyncio.to_thread(open_browser, config))
             else:
@@ -278,6 +333,10 @@ async def main_starter_async():
             if not task.done():
                 task.cancel()
         
+        # Release the LSP port if the LSP server never took it over
+        if lsp_socket:
+            lsp_socket.close()
+        
         # Ensure cleanup happens
         cleanup_all()
         
@@ -286,15 +345,15 @@ async def main_starter_async():
 
 def main_starter():
     try:
-        try:
-            from .logger import Logger
-        except ImportError:
-            from logger import Logger
-
         Logger.configure(log_dir='/tmp', default_name='AiderServer')
         Logger.info("Starting aider-server")
         
-        exit_code = asyncio.run(main_starter_async())
+        # The event loop is chosen on the command line, so parse it before starting one
+        config = ServerConfig.from_args()
+        exit_code = asyncio.run(
+            main_starter_async(config),
+            loop_factory=get_loop_factory(config.event_loop)
+        )
         return exit_code if exit_code else 0
         
     except KeyboardInterrupt:
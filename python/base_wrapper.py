@@ -1,6 +1,7 @@
 import asyncio
+import contextvars
+import functools
 import threading
-from datetime import datetime
 try:
     from .logger import Logger
 except ImportError:
@@ -10,8 +11,10 @@ class BaseWrapper:
     """Base class for wrappers that provides common functionality"""
     
     def __init__(self):
-        # Register this class instance with the logger
+        # Register this class instance with the logger, keeping its logger so log()
+        # doesn't have to look it up from the call stack each time
         Logger.register_class(self)
+        self._logger = Logger.get_logger(self.__class__.__name__)
         
         # Try to get the main event loop reference
         self.main_loop = None
@@ -19,11 +22,38 @@ class BaseWrapper:
             self.main_loop = asyncio.get_running_loop()
         except RuntimeError:
             pass
+        
+        # Fire and forget sends don't need the caller's context variables
+        self._empty_context = contextvars.Context()
+        
+        self._bind_submit()
     
     def log(self, message):
         """Write a log message to the log file with timestamp (legacy method)"""
-        Logger.info(message)
+        self._logger.info(message)
 
+    def _bind_submit(self):
+        """Preselect how _submit schedules coroutines, call again if main_loop changes
+        
+        With a usable main_loop, _submit goes straight to run_coroutine_threadsafe,
+        skipping the checks _safe_create_task makes on every call.
+        """
+        if self.main_loop and not self.main_loop.is_closed():
+            self._submit = functools.partial(asyncio.run_coroutine_threadsafe, loop=self.main_loop)
+        else:
+            self._submit = self._safe_create_task
+    
+    def _fire(self, coro):
+        """Schedule a fire and forget coroutine on main_loop
+        
+        Unlike _safe_create_task, no concurrent Future is created to track the
+        result, and the task runs in an empty context instead of a copy of the caller's.
+        """
+        if self.main_loop and not self.main_loop.is_closed():
+            self.main_loop.call_soon_threadsafe(asyncio.ensure_future, coro, context=self._empty_context)
+        else:
+            self._safe_create_task(coro)
+    
     def _safe_create_task(self, coro):
         """Safely create an async task using main_loop if available"""
         try:
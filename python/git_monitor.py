@@ -22,6 +22,9 @@ class GitChangeHandler(FileSystemEventHandler):
         # Ignore read-only events like 'opened', 'closed', 'accessed'
         if event.event_type in ['opened', 'closed', 'accessed', 'closed_no_write']:
             return
+        
+        # Any change may affect search results
+        self.repo.git_search.clear_cache()
             
         # Ignore directory modification events - these are too noisy
         if event.event_type == 'modified' and event.is_directory:
@@ -108,6 +111,10 @@ class GitMonitor:
                 raise
             raise GitError(f"Error starting git monitor: {e}")
             
+    def is_running(self):
+        """Check if the git monitor is watching the repository"""
+        return bool(self._observer and self._observer.is_alive())
+            
     def stop_git_monitor(self):
         """Stop the git repository monitor"""
         try:
@@ -146,6 +146,13 @@ class GitOperations:
         except Exception as e:
             return create_error_response(e)
 
+    def get_rebase_operation_result(self, operation_id):
+        """Get the result of a background rebase command"""
+        try:
+            return self.rebase_ops.get_rebase_operation_result(operation_id)
+        except Exception as e:
+            return create_error_response(e)
+
     # Git editor operations - delegate to editor_ops
     def get_git_editor_status(self):
         """Get comprehensive Git editor status - detects what Git is waiting for"""
@@ -1,16 +1,29 @@
+import asyncio
 import os
 import subprocess
-import tempfile
+import threading
+import time
 try:
-    from .exceptions import GitError, GitRepositoryError, FileOperationError
+    from .exceptions import GitError, GitRepositoryError, FileOperationError, create_error_response
 except ImportError:
-    from exceptions import GitError, GitRepositoryError, FileOperationError
+    from exceptions import GitError, GitRepositoryError, FileOperationError, create_error_response
 
 class GitRebaseOperations:
     """Handles Git rebase operations including interactive rebase and conflict resolution"""
     
+    # How long a cached "not in rebase" status may be reused (seconds)
+    IDLE_STATUS_TTL = 0.5
+    
     def __init__(self, repo_instance):
         self.repo = repo_instance
+        # (key, result, timestamp) of the last get_rebase_status call
+        self._status_cache = (None, None, 0.0)
+        # The background rebase command whose result has not been read yet, see
+        # get_rebase_operation_result. Written on the main loop and read from RPC
+        # threads, so only accessed holding _operation_lock
+        self._operation = None
+        self._operation_id = 0
+        self._operation_lock = threading.Lock()
     
     def _ensure_repo(self):
         """Ensure repository is available, raise exception if not"""
@@ -43,90 +56,230 @@ class GitRebaseOperations:
                 raise
             raise GitError(f"Error starting interactive rebase: {e}")
 
+    def _get_mtime(self, path):
+        """Get the mtime of a path in nanoseconds, or None if it does not exist"""
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+    
+    # Files in the git directory read by the editor status, which editors
+    # rewrite in place without touching the directory mtime
+    EDITOR_STATE_FILES = (
+        'REBASE_HEAD', 'COMMIT_EDITMSG', 'MERGE_MSG', 'SQUASH_MSG',
+        'TAG_EDITMSG', 'config.edit', 'config'
+    )
+    
+    def _get_rebase_status_key(self, git_dir):
+        """Build a cache key from the mtimes of the files that define the rebase state"""
+        rebase_merge_dir = os.path.join(git_dir, 'rebase-merge')
+        return (
+            self._get_mtime(git_dir),
+            self._get_mtime(rebase_merge_dir),
+            self._get_mtime(os.path.join(rebase_merge_dir, 'git-rebase-todo')),
+            self._get_mtime(os.path.join(git_dir, 'rebase-apply')),
+            self._get_mtime(os.path.join(git_dir, 'index'))
+        ) + tuple(
+            self._get_mtime(os.path.join(git_dir, name))
+            for name in self.EDITOR_STATE_FILES
+        )
+    
     def get_rebase_status(self):
-        """Get the current rebase status and todo file content"""
+        """Get the current rebase status and todo file content
+        
+        The result is cached and reused while the rebase state files are unchanged.
+        A cached "not in rebase" result expires after IDLE_STATUS_TTL so that
+        other changes picked up by the editor status are still noticed.
+        """
         try:
             self._ensure_repo()
             
             git_dir = self.repo.repo.git_dir
-            rebase_merge_dir = os.path.join(git_dir, 'rebase-merge')
-            rebase_apply_dir = os.path.join(git_dir, 'rebase-apply')
-            
-            # Check if we're in a rebase
-            if os.path.exists(rebase_merge_dir):
-                # Interactive rebase
-                todo_file = os.path.join(rebase_merge_dir, 'git-rebase-todo')
-                done_file = os.path.join(rebase_merge_dir, 'done')
-                head_name_file = os.path.join(rebase_merge_dir, 'head-name')
-                onto_file = os.path.join(rebase_merge_dir, 'onto')
-                
-                todo_content = ""
-                done_content = ""
-                head_name = ""
-                onto = ""
-                
-                if os.path.exists(todo_file):
-                    with open(todo_file, 'r', encoding='utf-8') as f:
-                        todo_content = f.read()
-                
-                if os.path.exists(done_file):
-                    with open(done_file, 'r', encoding='utf-8') as f:
-                        done_content = f.read()
-                
-                if os.path.exists(head_name_file):
-                    with open(head_name_file, 'r', encoding='utf-8') as f:
-                        head_name = f.read().strip()
-                
-                if os.path.exists(onto_file):
-                    with open(onto_file, 'r', encoding='utf-8') as f:
-                        onto = f.read().strip()
-                
-                # Check if we have todo content or if the rebase is waiting for editor
-                has_todo_content = bool(todo_content.strip())
-                
-                # Get comprehensive editor status
-                from .git_operations_editor import GitEditorOperations
-                editor_ops = GitEditorOperations(self.repo)
-                editor_status = editor_ops.get_git_editor_status()
-                
-                result = {
-                    "in_rebase": True,
-                    "rebase_type": "interactive",
-                    "todo_content": todo_content,
-                    "done_content": done_content,
-                    "head_name": head_name,
-                    "onto": onto,
-                    "todo_file_path": todo_file,
-                    "has_todo_content": has_todo_content,
-                    "editor_status": editor_status
-                }
-                
-                return result
-                
-            elif os.path.exists(rebase_apply_dir):
-                # Non-interactive rebase
-                from .git_operations_editor import GitEditorOperations
-                editor_ops = GitEditorOperations(self.repo)
-                editor_status = editor_ops.get_git_editor_status()
-                return {
-                    "in_rebase": True,
-                    "rebase_type": "apply",
-                    "message": "Non-interactive rebase in progress",
-                    "editor_status": editor_status
-                }
-            else:
-                from .git_operations_editor import GitEditorOperations
-                editor_ops = GitEditorOperations(self.repo)
-                editor_status = editor_ops.get_git_editor_status()
-                return {
-                    "in_rebase": False,
-                    "editor_status": editor_status
-                }
+            key = self._get_rebase_status_key(git_dir)
+            cached_key, cached_result, cached_time = self._status_cache
+            
+            if cached_result is not None and key == cached_key:
+                if cached_result.get("in_rebase") or time.monotonic() - cached_time < self.IDLE_STATUS_TTL:
+                    return cached_result
+            
+            result = self._compute_rebase_status(git_dir)
+            self._status_cache = (key, result, time.monotonic())
+            return result
                 
         except Exception as e:
             if isinstance(e, GitRepositoryError):
                 raise
             raise GitError(f"Error getting rebase status: {e}")
+    
+    def _compute_rebase_status(self, git_dir):
+        """Read the rebase state from the git directory"""
+        rebase_merge_dir = os.path.join(git_dir, 'rebase-merge')
+        rebase_apply_dir = os.path.join(git_dir, 'rebase-apply')
+        
+        # Check if we're in a rebase
+        if os.path.exists(rebase_merge_dir):
+            # Interactive rebase
+            todo_file = os.path.join(rebase_merge_dir, 'git-rebase-todo')
+            done_file = os.path.join(rebase_merge_dir, 'done')
+            head_name_file = os.path.join(rebase_merge_dir, 'head-name')
+            onto_file = os.path.join(rebase_merge_dir, 'onto')
+            
+            todo_content = ""
+            done_content = ""
+            head_name = ""
+            onto = ""
+            
+            if os.path.exists(todo_file):
+                with open(todo_file, 'r', encoding='utf-8') as f:
+                    todo_content = f.read()
+            
+            if os.path.exists(done_file):
+                with open(done_file, 'r', encoding='utf-8') as f:
+                    done_content = f.read()
+            
+            if os.path.exists(head_name_file):
+                with open(head_name_file, 'r', encoding='utf-8') as f:
+                    head_name = f.read().strip()
+            
+            if os.path.exists(onto_file):
+                with open(onto_file, 'r', encoding='utf-8') as f:
+                    onto = f.read().strip()
+            
+            # Check if we have todo content or if the rebase is waiting for editor
+            has_todo_content = bool(todo_content.strip())
+            
+            # Get comprehensive editor status
+            from .git_operations_editor import GitEditorOperations
+            editor_ops = GitEditorOperations(self.repo)
+            editor_status = editor_ops.get_git_editor_status()
+            
+            result = {
+                "in_rebase": True,
+                "rebase_type": "interactive",
+                "todo_content": todo_content,
+                "done_content": done_content,
+                "head_name": head_name,
+                "onto": onto,
+                "todo_file_path": todo_file,
+                "has_todo_content": has_todo_content,
+                "editor_status": editor_status
+            }
+            
+            return result
+            
+        elif os.path.exists(rebase_apply_dir):
+            # Non-interactive rebase
+            from .git_operations_editor import GitEditorOperations
+            editor_ops = GitEditorOperations(self.repo)
+            editor_status = editor_ops.get_git_editor_status()
+            return {
+                "in_rebase": True,
+                "rebase_type": "apply",
+                "message": "Non-interactive rebase in progress",
+                "editor_status": editor_status
+            }
+        else:
+            from .git_operations_editor import GitEditorOperations
+            editor_ops = GitEditorOperations(self.repo)
+            editor_status = editor_ops.get_git_editor_status()
+            return {
+                "in_rebase": False,
+                "editor_status": editor_status
+            }
+
+    def _get_editor_env(self):
+        """Get an environment that prevents git from opening interactive editors"""
+        env = os.environ.copy()
+        env['GIT_EDITOR'] = 'true'  # Use 'true' command which does nothing
+        env['EDITOR'] = 'true'
+        env['VISUAL'] = 'true'
+        env['GIT_SEQUENCE_EDITOR'] = 'true'
+        return env
+    
+    async def _run_git_async(self, args, env=None):
+        """Run a git command without blocking the event loop
+        
+        Returns:
+            tuple: (returncode, stdout, stderr)
+        """
+        process = await asyncio.create_subprocess_exec(
+            'git', *args,
+            cwd=self.repo.repo.working_tree_dir,
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        return (
+            process.returncode,
+            stdout.decode('utf-8', errors='replace'),
+            stderr.decode('utf-8', errors='replace')
+        )
+    
+    def _start_operation(self, coro):
+        """Run a rebase command in the background and return a handle to poll for its result
+        
+        JRPC-OO cannot dispatch async methods, so long running rebase commands are
+        scheduled on the main loop and the webapp polls get_rebase_operation_result.
+        """
+        with self._operation_lock:
+            if self._operation and not self._operation['done']:
+                coro.close()
+                raise GitError("A rebase command is already running")
+            
+            self._operation_id += 1
+            operation = {"id": self._operation_id, "done": False, "result": None}
+            self._operation = operation
+        
+        async def run_operation():
+            try:
+                result = await coro
+            except Exception as e:
+                if not isinstance(e, (GitRepositoryError, GitError)):
+                    e = GitError(f"Error running rebase command: {e}")
+                result = create_error_response(e)
+            with self._operation_lock:
+                operation["result"] = result
+                operation["done"] = True
+        
+        self.repo._safe_create_task(run_operation())
+        return {"success": True, "pending": True, "operation_id": operation["id"]}
+    
+    def get_rebase_operation_result(self, operation_id):
+        """Get the result of a background rebase command, or a pending marker if it is still running
+        
+        A result can only be read once, the operation is forgotten after that.
+        """
+        with self._operation_lock:
+            operation = self._operation
+            if not operation or operation["id"] != operation_id:
+                raise GitError(f"Unknown rebase operation: {operation_id}")
+            
+            if not operation["done"]:
+                return {"success": True, "pending": True, "operation_id": operation_id}
+            
+            self._operation = None
+            return operation["result"]
+    
+    async def _get_unmerged_files(self):
+        """Get the paths of all unmerged (conflicted) files
+        
+        Reads the unmerged index entries with `git ls-files -u -z`, which covers
+        every conflict state (UU, AA, DD, AU, UA, UD, DU) without the working
+        tree scan that `git status` performs.
+        """
+        returncode, stdout, _ = await self._run_git_async(['ls-files', '-u', '-z'])
+        
+        if returncode != 0:
+            return []
+        
+        # Each record is "<mode> <object> <stage>\t<path>", one per conflict stage
+        unmerged_files = {}
+        for record in stdout.split('\0'):
+            if '\t' in record:
+                unmerged_files[record.split('\t', 1)[1]] = None
+        
+        return list(unmerged_files)
 
     def execute_rebase(self, rebase_plan=None):
         """Execute the interactive rebase with the given plan or continue existing rebase"""
@@ -144,69 +297,53 @@ class GitRebaseOperations:
             if not rebase_plan:
                 raise GitError("No rebase plan provided and no active rebase found")
             
-            # Create a temporary rebase script
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-                for commit in rebase_plan:
-                    action = commit.get('action', 'pick')
-                    commit_hash = commit['hash']
-                    message = commit.get('message', '').replace('\n', ' ')
-                    
-                    if action == 'drop':
-                        continue  # Skip dropped commits
-                    
-                    f.write(f"{action} {commit_hash} {message}\n")
-                
-                script_path = f.name
-            
-            try:
-                # Set up environment for interactive rebase - prevent any editors
-                env = os.environ.copy()
-                env['GIT_SEQUENCE_EDITOR'] = f'cp {script_path}'
-                env['GIT_EDITOR'] = 'true'  # Use 'true' command which does nothing
-                env['EDITOR'] = 'true'
-                env['VISUAL'] = 'true'
+            # Build the rebase todo list in memory
+            todo_lines = []
+            for commit in rebase_plan:
+                action = commit.get('action', 'pick')
+                commit_hash = commit['hash']
+                message = commit.get('message', '').replace('\n', ' ')
                 
-                # Start the rebase
-                result = subprocess.run([
-                    'git', 'rebase', '-i', '--autosquash', f"{rebase_plan[0]['hash']}^"
-                ], cwd=self.repo.repo.working_tree_dir, capture_output=True, text=True, env=env)
+                if action == 'drop':
+                    continue  # Skip dropped commits
                 
-                if result.returncode == 0:
-                    return {"success": True}
-                else:
-                    # Check if there are conflicts
-                    status_result = subprocess.run([
-                        'git', 'status', '--porcelain'
-                    ], cwd=self.repo.repo.working_tree_dir, capture_output=True, text=True)
-                    
-                    conflict_files = []
-                    if status_result.returncode == 0:
-                        for line in status_result.stdout.strip().split('\n'):
-                            if line.startswith('UU ') or line.startswith('AA ') or line.startswith('DD '):
-                                conflict_files.append(line[3:])
-                    
-                    if conflict_files:
-                        return {
-                            "success": False,
-                            "conflicts": conflict_files,
-                            "currentStep": 1,
-                            "error": "Conflicts detected during rebase"
-                        }
-                    else:
-                        raise GitError(f"Rebase failed: {result.stderr}")
-                        
-            finally:
-                # Clean up temporary file
-                try:
-                    os.unlink(script_path)
-                except:
-                    pass
+                todo_lines.append(f"{action} {commit_hash} {message}\n")
+            
+            # Set up environment for interactive rebase - prevent any editors
+            env = self._get_editor_env()
+            # The sequence editor writes the todo list straight from the environment
+            # into the file git passes it, avoiding a temporary file
+            env['REBASE_TODO'] = ''.join(todo_lines)
+            env['GIT_SEQUENCE_EDITOR'] = 'sh -c \'printf "%s" "$REBASE_TODO" > "$1"\' --'
+            
+            return self._start_operation(self._execute_rebase_async(rebase_plan[0]['hash'], env))
                     
         except Exception as e:
             if isinstance(e, (GitRepositoryError, GitError)):
                 raise
             raise GitError(f"Error executing rebase: {e}")
 
+    async def _execute_rebase_async(self, base_commit, env):
+        """Run the interactive rebase onto the parent of base_commit"""
+        returncode, _, stderr = await self._run_git_async([
+            'rebase', '-i', '--autosquash', f"{base_commit}^"
+        ], env)
+        
+        if returncode == 0:
+            return {"success": True}
+        
+        # Check if there are conflicts
+        conflict_files = await self._get_unmerged_files()
+        
+        if conflict_files:
+            return {
+                "success": False,
+                "conflicts": conflict_files,
+                "currentStep": 1,
+                "error": "Conflicts detected during rebase"
+            }
+        raise GitError(f"Rebase failed: {stderr}")
+
     def get_conflict_content(self, file_path):
         """Get the conflict content for a file (ours, theirs, and merged)"""
         try:
@@ -280,67 +417,47 @@ class GitRebaseOperations:
         try:
             self._ensure_repo()
             
-            # Set up environment to prevent interactive editors
-            env = os.environ.copy()
-            env['GIT_EDITOR'] = 'true'  # Use 'true' command which does nothing
-            env['EDITOR'] = 'true'
-            env['VISUAL'] = 'true'
-            env['GIT_SEQUENCE_EDITOR'] = 'true'
-            
-            result = subprocess.run([
-                'git', 'rebase', '--continue'
-            ], cwd=self.repo.repo.working_tree_dir, capture_output=True, text=True, env=env)
-            
-            if result.returncode == 0:
-                return {"success": True}
-            else:
-                # Check for more conflicts
-                status_result = subprocess.run([
-                    'git', 'status', '--porcelain'
-                ], cwd=self.repo.repo.working_tree_dir, capture_output=True, text=True)
-                
-                conflict_files = []
-                if status_result.returncode == 0:
-                    for line in status_result.stdout.strip().split('\n'):
-                        if line.startswith('UU ') or line.startswith('AA ') or line.startswith('DD '):
-                            conflict_files.append(line[3:])
-                
-                if conflict_files:
-                    return {
-                        "success": False,
-                        "conflicts": conflict_files,
-                        "error": "More conflicts detected"
-                    }
-                else:
-                    raise GitError(f"Failed to continue rebase: {result.stderr}")
+            return self._start_operation(self._continue_rebase_async())
                     
         except Exception as e:
             if isinstance(e, (GitRepositoryError, GitError)):
                 raise
             raise GitError(f"Error continuing rebase: {e}")
 
+    async def _continue_rebase_async(self):
+        """Run git rebase --continue and report any further conflicts"""
+        returncode, _, stderr = await self._run_git_async(['rebase', '--continue'], self._get_editor_env())
+        
+        if returncode == 0:
+            return {"success": True}
+        
+        # Check for more conflicts
+        conflict_files = await self._get_unmerged_files()
+        
+        if conflict_files:
+            return {
+                "success": False,
+                "conflicts": conflict_files,
+                "error": "More conflicts detected"
+            }
+        raise GitError(f"Failed to continue rebase: {stderr}")
+
     def abort_rebase(self):
         """Abort the current rebase"""
         try:
             self._ensure_repo()
             
-            # Set up environment to prevent interactive editors
-            env = os.environ.copy()
-            env['GIT_EDITOR'] = 'true'  # Use 'true' command which does nothing
-            env['EDITOR'] = 'true'
-            env['VISUAL'] = 'true'
-            env['GIT_SEQUENCE_EDITOR'] = 'true'
-            
-            result = subprocess.run([
-                'git', 'rebase', '--abort'
-            ], cwd=self.repo.repo.working_tree_dir, capture_output=True, text=True, env=env)
-            
-            if result.returncode == 0:
-                return {"success": True, "message": "Rebase aborted successfully"}
-            else:
-                raise GitError(f"Failed to abort rebase: {result.stderr}")
+            return self._start_operation(self._abort_rebase_async())
                 
         except Exception as e:
             if isinstance(e, (GitRepositoryError, GitError)):
                 raise
             raise GitError(f"Error aborting rebase: {e}")
+
+    async def _abort_rebase_async(self):
+        """Run git rebase --abort"""
+        returncode, _, stderr = await self._run_git_async(['rebase', '--abort'], self._get_editor_env())
+        
+        if returncode == 0:
+            return {"success": True, "message": "Rebase aborted successfully"}
+        raise GitError(f"Failed to abort rebase: {stderr}")
@@ -1,22 +1,91 @@
+import base64
+import json
 import os
 import re
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
 import git
 try:
     from .exceptions import GitError, GitRepositoryError
+    from .logger import Logger
 except ImportError:
     from exceptions import GitError, GitRepositoryError
+    from logger import Logger
+
+# Prefer RE2 for user supplied patterns - it matches in linear time, so a
+# pathological regex cannot pin the CPU with catastrophic backtracking.
+# Install it with the re2 extra: pip install -e .[re2]
+try:
+    import re2 as re_engine
+except ImportError:
+    re_engine = re
+
+# A quantifier that repeats an unbounded or multiple number of times
+_REPEAT_RE = re.compile(r'[*+]|\{\d*,\d*\}|\{\d+\}')
 
 class GitSearch:
     """Handles searching for content in repository files"""
     
+    # Buffer size used when streaming files in the Python search fallback
+    READ_BUFFER_SIZE = 1 << 16
+    
+    # Extensions that are always treated as binary and never searched
+    BINARY_EXTS = frozenset({
+        '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.tif', '.tiff',
+        '.pdf', '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.jar', '.whl',
+        '.so', '.o', '.a', '.dll', '.dylib', '.exe', '.bin', '.class', '.pyc', '.pyo',
+        '.woff', '.woff2', '.ttf', '.otf', '.eot', '.mp3', '.mp4', '.wav', '.ogg',
+        '.avi', '.mov', '.mkv', '.sqlite', '.db'
+    })
+    
+    # Number of leading bytes inspected when sniffing for binary content
+    BINARY_SNIFF_SIZE = 4096
+    
+    # Maximum number of git grep results kept in the LRU search cache
+    GREP_CACHE_SIZE = 32
+    
+    # Longest regex accepted when patterns are run with the backtracking re module
+    MAX_REGEX_LENGTH = 1000
+    
     def __init__(self, repo_instance):
         self.repo = repo_instance
+        # ripgrep is used as the first fallback when git grep fails, if installed
+        self._rg_path = shutil.which('rg')
+        
+        # git grep results keyed on (HEAD oid, index mtime, git args). git grep also
+        # reads the working tree, so the git monitor clears the cache on file changes
+        self._grep_cache = OrderedDict()
+        self._grep_cache_lock = threading.Lock()
+        self._grep_cache_generation = 0
     
     def _ensure_repo(self):
         """Ensure repository is available, raise exception if not"""
         if not self.repo.repo:
             raise GitRepositoryError("No Git repository available")
     
+    def clear_cache(self):
+        """Drop cached search results, called when files in the repository change"""
+        with self._grep_cache_lock:
+            self._grep_cache_generation += 1
+            self._grep_cache.clear()
+    
+    def _get_grep_cache_key(self, git_args):
+        """Build the search cache key, or None if results should not be cached"""
+        # Without the git monitor, working tree changes would go unnoticed
+        if not self.repo.git_monitor.is_running():
+            return None
+        
+        try:
+            head_oid = self.repo.repo.head.commit.hexsha
+            index_mtime = os.stat(os.path.join(self.repo.repo.git_dir, 'index')).st_mtime_ns
+        except (ValueError, OSError):
+            # No commits yet or no index
+            return None
+        
+        return (head_oid, index_mtime, tuple(git_args))
+    
     def search_files(self, query, word=False, regex=False, respect_gitignore=True, ignore_case=False):
         """Search for content in repository files
         
@@ -36,8 +105,13 @@ class GitSearch:
             # Use the optimized git grep implementation for faster searches
             return self._search_with_git_grep(query, word, regex, respect_gitignore, ignore_case)
         except git.exc.GitCommandError as e:
-            # If git grep fails, fall back to the Python implementation
-            self.repo.log(f"Git grep failed: {e}. Using Python implementation.")
+            # If git grep fails, fall back to ripgrep if available, then to the Python implementation
+            self.repo.log(f"Git grep failed: {e}. Using fallback search.")
+            if self._rg_path:
+                try:
+                    return self._search_with_ripgrep(query, word, regex, respect_gitignore, ignore_case)
+                except GitError as rg_error:
+                    self.repo.log(f"ripgrep failed: {rg_error}. Using Python implementation.")
             return self._search_with_python(query, word, regex, respect_gitignore, ignore_case)
         except Exception as e:
             if isinstance(e, GitRepositoryError):
@@ -75,8 +149,15 @@ class GitSearch:
         # Always skip binary files
         git_args.append("-I")  # --binary-files=without-match
         
-        # Add the query as the last argument
-        git_args.append(query)
+        # Pass the query with -e so a query starting with '-' is not taken as an option
+        git_args.extend(["-e", query])
+        
+        cache_key = self._get_grep_cache_key(git_args)
+        with self._grep_cache_lock:
+            generation = self._grep_cache_generation
+            if cache_key is not None and cache_key in self._grep_cache:
+                self._grep_cache.move_to_end(cache_key)
+                return self._grep_cache[cache_key]
         
         try:
             # Execute git grep and get results
@@ -105,10 +186,20 @@ class GitSearch:
                             "line": line_content.rstrip('\n')
                         })
                     except ValueError:
-                        self.repo.log(f"Warning: Could not parse line number from git grep output: {line}")
+                        if Logger.is_enabled('info'):
+                            self.repo.log(f"Warning: Could not parse line number from git grep output: {line}")
             
             # Convert dict to list for final results
-            return list(consolidated_results.values())
+            results = list(consolidated_results.values())
+            
+            # Only cache if nothing changed while git grep was running
+            with self._grep_cache_lock:
+                if cache_key is not None and generation == self._grep_cache_generation:
+                    self._grep_cache[cache_key] = results
+                    if len(self._grep_cache) > self.GREP_CACHE_SIZE:
+                        self._grep_cache.popitem(last=False)
+            
+            return results
             
         except git.exc.GitCommandError as e:
             # git grep returns exit code 1 if no matches found
@@ -117,94 +208,228 @@ class GitSearch:
             # For other errors, re-raise to fall back to Python implementation
             raise
     
-    def _search_with_python(self, query, word=False, regex=False, respect_gitignore=True, ignore_case=False):
-        """Fallback search implementation using Python when git grep fails"""
+    def _search_with_ripgrep(self, query, word=False, regex=False, respect_gitignore=True, ignore_case=False):
+        """Search for content in repository files using ripgrep
+        
+        Mirrors the Python fallback: hidden files are searched, .git and files
+        over 1MB are skipped, and binary files are ignored.
+        """
+        rg_args = [self._rg_path, '--json', '--no-messages', '--hidden', '--glob', '!.git', '--max-filesize', '1M']
+        
+        if ignore_case:
+            rg_args.append('-i')
+        
+        if word:
+            rg_args.append('-w')
+        
+        if not regex:
+            rg_args.append('-F')
+        
+        if not respect_gitignore:
+            rg_args.append('--no-ignore')
+        
+        rg_args.extend(['--', query])
+        
+        try:
+            result = subprocess.run(rg_args, cwd=self.repo.repo.working_tree_dir, capture_output=True)
+        except OSError as e:
+            raise GitError(f"Could not run ripgrep: {e}")
+        
+        # ripgrep returns exit code 1 if no matches found
+        if result.returncode == 1:
+            return []
+        if result.returncode != 0:
+            raise GitError(f"ripgrep exited with code {result.returncode}: {result.stderr.decode('utf-8', errors='replace')}")
+        
+        consolidated_results = {}
+        for line in result.stdout.splitlines():
+            try:
+                event = json.loads(line)
+            except ValueError as e:
+                raise GitError(f"Could not parse ripgrep output: {e}")
+            if event.get('type') != 'match':
+                continue
+            
+            data = event['data']
+            file_path = self._decode_rg_data(data['path'])
+            
+            if file_path not in consolidated_results:
+                consolidated_results[file_path] = {
+                    "file": file_path,
+                    "matches": []
+                }
+            
+            consolidated_results[file_path]["matches"].append({
+                "line_num": data['line_number'],
+                "line": self._decode_rg_data(data['lines']).rstrip('\r\n')
+            })
+        
+        return list(consolidated_results.values())
+    
+    def _decode_rg_data(self, data):
+        """Decode a ripgrep JSON data object, which holds either 'text' or base64 'bytes'"""
+        if 'text' in data:
+            return data['text']
+        return base64.b64decode(data['bytes']).decode('utf-8', errors='replace')
+    
+    @classmethod
+    def _check_regex_complexity(cls, query):
+        """Reject patterns that could backtrack catastrophically with the re module
+        
+        Only needed without RE2. Long patterns are refused, as are nested
+        quantifiers such as (a+)+ or (\\w*\\s?)*, the usual cause of exponential
+        matching time.
+        
+        Raises:
+            ValueError: If the pattern is too long or has nested quantifiers
+        """
+        if len(query) > cls.MAX_REGEX_LENGTH:
+            raise ValueError(
+                f"Regular expression is longer than {cls.MAX_REGEX_LENGTH} characters, install google-re2 to allow it"
+            )
+        
+        # One entry per open group, True once the group contains a quantifier
+        groups = [False]
+        i = 0
+        while i < len(query):
+            char = query[i]
+            if char == '\\':
+                i += 2
+                continue
+            if char == '[':
+                # Skip the character class, a leading ] or ^] is part of it
+                i += 1
+                if i < len(query) and query[i] == '^':
+                    i += 1
+                if i < len(query) and query[i] == ']':
+                    i += 1
+                while i < len(query) and query[i] != ']':
+                    i += 2 if query[i] == '\\' else 1
+            elif char == '(':
+                groups.append(False)
+            elif char == ')' and len(groups) > 1:
+                quantified = groups.pop()
+                if quantified and _REPEAT_RE.match(query, i + 1):
+                    raise ValueError(
+                        "Regular expression has nested quantifiers, install google-re2 to allow it"
+                    )
+                groups[-1] = groups[-1] or quantified
+            elif _REPEAT_RE.match(query, i):
+                groups[-1] = True
+            i += 1
+    
+    def _search_with_python(self, query, word=False, regex=False, respect_gitignore=True, ignore_case=False,
+                            max_matches_per_file=None):
+        """Fallback search implementation using Python when git grep fails
+        
+        Plain text and whole word searches stream files line by line, while
+        regex searches scan each file (at most 1MB) in a single pass. If
+        max_matches_per_file is set, scanning a file stops once that many
+        matching lines have been found.
+        """
         try:
             results = []
             repo_root = self.repo.repo.working_tree_dir
             
-            # Prepare the search pattern based on parameters
+            # Prepare the search pattern based on parameters. Patterns are run over
+            # whole files, so ^ and $ must match at every line boundary
+            flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
             if regex:
+                # Flags are given inline as both re and RE2 understand them
+                inline_flags = '(?mi)' if ignore_case else '(?m)'
+                if re_engine is re:
+                    self._check_regex_complexity(query)
                 try:
                     if word:
                         # For word+regex, we'll add word boundary assertions
-                        pattern = re.compile(r'\b' + query + r'\b', re.IGNORECASE if ignore_case else 0)
+                        pattern = re_engine.compile(inline_flags + r'\b' + query + r'\b')
                     else:
-                        pattern = re.compile(query, re.IGNORECASE if ignore_case else 0)
-                except re.error as e:
+                        pattern = re_engine.compile(inline_flags + query)
+                except (re.error, re_engine.error) as e:
                     raise ValueError(f"Invalid regular expression: {e}")
             else:
                 if word:
-                    # For word-only search, prepare for whole word matching
+                    # A whole word match means the query equals a run of word characters,
+                    # so a query containing anything else can never match
+                    if not re.fullmatch(r'\w+', query):
+                        return []
+                    # Kept as a str pattern so \w has the same Unicode meaning as before
+                    word_pattern = re.compile(
+                        r'(?<!\w)' + re.escape(query) + r'(?!\w)',
+                        re.IGNORECASE if ignore_case else 0
+                    )
                     pattern = None  # We'll handle this separately
                 else:
                     # For plain text search, escape regex special chars
-                    pattern = re.compile(re.escape(query), re.IGNORECASE if ignore_case else 0)
+                    pattern = re.compile(re.escape(query), flags)
+            
+            # Plain text and whole word searches start with a byte substring test,
+            # which is much cheaper than running the regex engine per line.
+            # bytes.lower() only folds ASCII, so case-insensitive non-ASCII queries
+            # skip this test.
+            needle = None
+            if not regex and (not ignore_case or query.isascii()):
+                needle = query.encode('utf-8')
+                if ignore_case:
+                    needle = needle.lower()
             
             # Walk through all files in the repository
-            for root, _, files in os.walk(repo_root):
-                for file in files:
-                    full_path = os.path.join(root, file)
-                    
-                    # Get relative path
-                    rel_path = os.path.relpath(full_path, repo_root)
+            for full_path, rel_path, size in self._iter_repo_files(repo_root):
+                # Skip very large files
+                if size > 1024 * 1024:  # Skip files > 1MB
+                    continue
                 
-                    # Skip binary files, .git directory, and very large files
-                    if (rel_path.startswith('.git/') or 
-                        os.path.getsize(full_path) > 1024 * 1024):  # Skip files > 1MB
-                        continue
+                # Skip binary files, as git grep -I does. This is much cheaper
+                # than the gitignore check below, so do it first
+                if self._looks_binary(full_path):
+                    continue
                 
-                    # Check if file is ignored by gitignore
-                    if respect_gitignore:
-                        try:
-                            # Use git's check-ignore command to see if file is ignored
-                            self.repo.repo.git.check_ignore(rel_path)
-                            # If we reach here, the file is ignored (command succeeded)
-                            continue
-                        except git.exc.GitCommandError:
-                            # File is not ignored (command failed)
-                            pass
-                    
+                # Check if file is ignored by gitignore
+                if respect_gitignore:
                     try:
-                        with open(full_path, 'r', encoding='utf-8') as f:
-                            lines = f.readlines()
-                    except UnicodeDecodeError:
-                        # Skip binary files that couldn't be decoded as utf-8
+                        # Use git's check-ignore command to see if file is ignored
+                        self.repo.repo.git.check_ignore(rel_path)
+                        # If we reach here, the file is ignored (command succeeded)
                         continue
+                    except git.exc.GitCommandError:
+                        # File is not ignored (command failed)
+                        pass
+                
+                if needle is not None and not word:
+                    try:
+                        file_matches = self._search_file_literal(
+                            full_path, needle, ignore_case, max_matches_per_file
+                        )
                     except Exception:
-                        # Skip files we can't read
+                        # Skip binary files and files we can't read
                         continue
                     
-                    file_matches = []
-                    for line_num, line in enumerate(lines, 1):
-                        if regex or not word:
-                            # Use regex pattern for both regex mode and plain text mode
-                            if pattern.search(line):
-                                file_matches.append({
-                                    "line_num": line_num,
-                                    "line": line.rstrip('\n')
-                                })
-                        else:
-                            # For word-only search, do manual word boundary checking
-                            words = re.findall(r'\b\w+\b', line)
-                            if ignore_case:
-                                # Case-insensitive comparison
-                                if any(query.lower() == word.lower() for word in words):
-                                    file_matches.append({
-                                        "line_num": line_num,
-                                        "line": line.rstrip('\n')
-                                    })
-                            elif query in words:
-                                file_matches.append({
-                                    "line_num": line_num,
-                                    "line": line.rstrip('\n')
-                                })
-                    
                     if file_matches:
                         results.append({
                             "file": rel_path,
                             "matches": file_matches
                         })
+                    continue
+                
+                try:
+                    if pattern is not None:
+                        file_matches = self._search_file_pattern(full_path, pattern, max_matches_per_file)
+                    else:
+                        file_matches = self._search_file_words(
+                            full_path, word_pattern, needle, ignore_case, max_matches_per_file
+                        )
+                except UnicodeDecodeError:
+                    # Skip binary files that couldn't be decoded as utf-8
+                    continue
+                except Exception:
+                    # Skip files we can't read
+                    continue
+                
+                if file_matches:
+                    results.append({
+                        "file": rel_path,
+                        "matches": file_matches
+                    })
             
             return results
             
@@ -212,3 +437,143 @@ class GitSearch:
             if isinstance(e, ValueError):
                 raise GitError(str(e))
             raise GitError(f"Error during Python search: {e}")
+    
+    def _iter_repo_files(self, repo_root):
+        """Walk the working tree with os.scandir, skipping .git directories
+        
+        Yields:
+            tuple: (full_path, rel_path, size) for each regular file. The size
+            comes from the DirEntry stat cache, avoiding an extra stat per file.
+        """
+        pending = [(repo_root, '')]
+        while pending:
+            dir_path, rel_dir = pending.pop()
+            try:
+                entries = os.scandir(dir_path)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    rel_path = rel_dir + entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name != '.git':
+                                pending.append((entry.path, rel_path + '/'))
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry.path, rel_path, entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+    
+    def _looks_binary(self, full_path):
+        """Check whether a file is binary from its extension or a NUL byte in its first block"""
+        if os.path.splitext(full_path)[1].lower() in self.BINARY_EXTS:
+            return True
+        try:
+            with open(full_path, 'rb') as f:
+                return b'\0' in f.read(self.BINARY_SNIFF_SIZE)
+        except OSError:
+            # Unreadable files are skipped like binaries
+            return True
+    
+    def _search_file_pattern(self, full_path, pattern, max_matches=None):
+        """Find the lines of a UTF-8 text file matching a compiled pattern
+        
+        The file is scanned with one regex pass instead of one search per line.
+        A match that runs past the end of its line is re-checked against that
+        line alone, so the results are the same as a line by line scan.
+        
+        Raises:
+            UnicodeDecodeError: If the file is not valid UTF-8
+        """
+        with open(full_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        
+        file_matches = []
+        text_len = len(text)
+        line_num = 1
+        counted_to = 0
+        pos = 0
+        while pos < text_len:
+            match = pattern.search(text, pos)
+            # A zero width match after the final newline is not on any line
+            if not match or (match.start() == text_len and text.endswith('\n')):
+                break
+            
+            line_start = text.rfind('\n', 0, match.start()) + 1
+            line_end = text.find('\n', match.start())
+            if line_end == -1:
+                line_end = text_len
+            
+            if match.end() > line_end and not pattern.search(text[line_start:line_end + 1]):
+                pos = line_end + 1
+                continue
+            
+            line_num += text.count('\n', counted_to, line_start)
+            counted_to = line_start
+            file_matches.append({
+                "line_num": line_num,
+                "line": text[line_start:line_end]
+            })
+            if max_matches and len(file_matches) >= max_matches:
+                break
+            pos = line_end + 1
+        return file_matches
+    
+    def _search_file_words(self, full_path, word_pattern, needle=None, ignore_case=False, max_matches=None):
+        """Find the lines of a UTF-8 text file containing a whole word match
+        
+        Args:
+            full_path (str): Absolute path of the file to search
+            word_pattern (re.Pattern): Pattern matching the query as a whole word
+            needle (bytes): UTF-8 encoded query, lowercased if ignore_case. Lines
+                without it are skipped before running word_pattern (optional)
+            ignore_case (bool): If True, compare needle against lowercased lines
+            max_matches (int): Stop after this many matching lines (optional)
+            
+        Raises:
+            UnicodeDecodeError: If a candidate line is not valid UTF-8
+        """
+        file_matches = []
+        with open(full_path, 'rb', buffering=self.READ_BUFFER_SIZE) as f:
+            for line_num, line in enumerate(f, 1):
+                if needle is not None:
+                    haystack = line.lower() if ignore_case else line
+                    if needle not in haystack:
+                        continue
+                
+                text = line.rstrip(b'\r\n').decode('utf-8')
+                if not word_pattern.search(text):
+                    continue
+                
+                file_matches.append({
+                    "line_num": line_num,
+                    "line": text
+                })
+                if max_matches and len(file_matches) >= max_matches:
+                    break
+        return file_matches
+    
+    def _search_file_literal(self, full_path, needle, ignore_case=False, max_matches=None):
+        """Find the lines of a file containing the byte string needle
+        
+        Args:
+            full_path (str): Absolute path of the file to search
+            needle (bytes): UTF-8 encoded search string, lowercased if ignore_case
+            ignore_case (bool): If True, compare against lowercased lines
+            max_matches (int): Stop after this many matching lines (optional)
+            
+        Returns:
+            list: Matches as dicts with 'line_num' and 'line'
+        """
+        file_matches = []
+        with open(full_path, 'rb', buffering=self.READ_BUFFER_SIZE) as f:
+            for line_num, line in enumerate(f, 1):
+                haystack = line.lower() if ignore_case else line
+                if needle in haystack:
+                    file_matches.append({
+                        "line_num": line_num,
+                        "line": line.rstrip(b'\r\n').decode('utf-8')
+                    })
+                    if max_matches and len(file_matches) >= max_matches:
+                        break
+        return file_matches
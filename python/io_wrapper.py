@@ -1,11 +1,10 @@
 import asyncio
-import os
-import time
-import tracemalloc
-import traceback
-from datetime import datetime
+import collections
 import concurrent.futures
+import os
 import threading
+from dataclasses import dataclass
+from typing import Any, Optional
 
 try:
     from .base_wrapper import BaseWrapper
@@ -16,23 +15,78 @@ except ImportError:
     from logger import Logger
     from exceptions import create_error_response
 
-# Enable tracemalloc for debugging
-tracemalloc.start()
+# Enable tracemalloc for debugging. It records a traceback per allocation for the
+# whole process, so only when asked for. EHIDE_TRACEMALLOC_FRAMES sets how many
+# frames are stored per traceback (python -X tracemalloc works as well)
+if os.environ.get('EHIDE_TRACEMALLOC'):
+    import tracemalloc
+    tracemalloc.start(int(os.environ.get('EHIDE_TRACEMALLOC_FRAMES', '1')))
+
+@dataclass(slots=True, frozen=True)
+class ConfirmationRequest:
+    """A confirm_ask question, with its arguments coerced once for the webapp"""
+    
+    question: str
+    default: Any
+    subject: Optional[str]
+    explicit_yes_required: bool
+    group: Optional[str]
+    allow_never: bool
+    
+    @classmethod
+    def from_args(cls, question, default, subject, explicit_yes_required, group, allow_never):
+        """Build a request from confirm_ask's arguments"""
+        return cls(
+            str(question) if question is not None else '',
+            default,
+            str(subject) if subject is not None else None,
+            explicit_yes_required,
+            str(group) if group is not None else None,
+            allow_never
+        )
+    
+    def to_dict(self):
+        """Get the request as sent to MessageHandler.confirmation_request"""
+        return {
+            'question': self.question,
+            'default': self.default,
+            'subject': self.subject,
+            'explicit_yes_required': self.explicit_yes_required,
+            'group': self.group,
+            'allow_never': self.allow_never
+        }
 
 class IOWrapper(BaseWrapper):
     """Wrapper for InputOutput that intercepts LLM responses for webapp display"""
     
+    # Streaming updates are coalesced for this long (seconds) before being sent
+    STREAM_FLUSH_DELAY = 0.015
+    
+    # Seconds a streamWrite may stay unanswered before its slot is freed
+    STREAM_WRITE_TIMEOUT = 5.0
+    
+    # Command output messages are buffered, and sent in batches of at most this many
+    OUTPUT_QUEUE_SIZE = 10000
+    OUTPUT_BATCH_SIZE = 64
+    
     def __init__(self, io_instance, port=8999):
         self.io = io_instance
-        Logger.info(f"IOWrapper initialized with io_instance: {io_instance}")
+        if Logger.is_enabled('info'):
+            Logger.info(f"IOWrapper initialized with io_instance: {io_instance}")
         
         # Initialize base class
         super().__init__()
         
-        # Keep track of connection status
-        self.connection_status_check_interval = 0.5  # seconds
+        # Keep track of connection status. remote_is_up and remote_disconnected
+        # update it as remotes come and go, polling is only a failsafe
+        self.connection_check_interval = 5.0  # seconds
         self.is_connected = True  # Start optimistic
+        # Set while connected, so waiters wake as soon as the connection is restored
+        self._connected_event = threading.Event()
+        self._connected_event.set()
         self._connection_check_task = None
+        # Resolved webapp RPC stubs, cleared whenever the connected remotes change
+        self._cached_stubs = {}
         # Define webapp URL - use port provided or default from environment variable
         self.webapp_url = os.environ.get('WS URI', f'ws://localhost:{port}')
         self._start_connection_monitor()
@@ -50,6 +104,13 @@ class IOWrapper(BaseWrapper):
         # Storage for responses
         self.last_response = None
         
+        # Latest streaming content waiting to be flushed to the webapp
+        self._stream_pending = None
+        self._stream_pending_final = False
+        self._stream_flush_handle = None
+        # The streamWrite in flight, only one is sent at a time
+        self._stream_inflight = None
+        
         # Set up command output interception
         # Store the original methods
         self.original_tool_output = io_instance.tool_output
@@ -57,52 +118,122 @@ class IOWrapper(BaseWrapper):
         self.original_tool_warning = io_instance.tool_warning
         self.original_print = io_instance.print
         
-        # Replace with our wrapper methods
-        io_instance.tool_output = self.tool_output_wrapper
-        io_instance.tool_error = self.tool_error_wrapper
-        io_instance.tool_warning = self.tool_warning_wrapper
-        io_instance.print = self.print_wrapper
+        # Replace with our wrapper methods, there is nothing to intercept without the event loop
+        self._install_output_wrappers(self.main_loop is not None)
         
         # Set up confirmation interception
         self.original_confirm_ask = io_instance.confirm_ask
         io_instance.confirm_ask = self.confirm_ask_wrapper
 
-        # Track if we've seen any command output for this request
-        self.has_command_output = False
+        # Seconds to wait for the user to answer a confirmation in the webapp before
+        # falling back to the console prompt, None waits indefinitely
+        self.confirm_timeout = None
+        # Confirmation requests waiting for an answer, cancelled on shutdown
+        self._pending_confirmations = set()
+        
+        # Track if the drain has sent command output since the last completion.
+        # Only used on main_loop
+        self._output_since_complete = False
+        
+        # Command output is buffered in a deque and drained on main_loop. A drain is
+        # only scheduled when the buffer goes from empty to non-empty, so a burst of
+        # output costs a single loop wakeup
+        self._output_pending = None
+        self._output_lock = threading.Lock()
+        self._output_drain_scheduled = False
+        # Messages dropped since the buffer last filled up
+        self._output_dropped = 0
+        if self.main_loop and not self.main_loop.is_closed():
+            self._output_pending = collections.deque()
         
         # Override prompt input to check for connections
         self.override_prompt_input()
         
     def _start_connection_monitor(self):
         """Start a background task to monitor connection status"""
-        def check_connection():
-            while True:
-                try:
-                    # Check connection status
-                    was_connected = self.is_connected
-                    self.is_connected = self._has_remote_connections()
-                    
-                    # If connection status changed
-                    if was_connected != self.is_connected:
-                        if self.is_connected:
-                            # Connection restored
-                            self.log("Remote connection established - enabling input")
-                            self.io.console.print("[green]Remote connection established - input enabled[/green]")
-                        else:
-                            # Connection lost
-                            self.log("No remote connections - disabling input")
-                            self.io.console.print("[red]No remote connections - input disabled[/red]")
-                            self.io.console.print(f"[yellow]In the webapp, use the server URI : [bold]{self.webapp_url}[/bold][/yellow]")
-                            self.io.console.print("[yellow]If the web app is already running, check its connection[/yellow]")
-                except Exception as e:
-                    self.log(f"Error in connection monitor: {e}")
-                
-                time.sleep(self.connection_status_check_interval)
+        if not self.main_loop or self.main_loop.is_closed():
+            # Nothing can reach the webapp without the event loop anyway
+            self.log("No event loop available - connection monitor not started")
+            return
+        
+        # Poll from the event loop rather than a dedicated thread
+        def start_task():
+            self._connection_check_task = asyncio.ensure_future(self._monitor_connection())
+        self.main_loop.call_soon_threadsafe(start_task)
+    
+    async def _monitor_connection(self):
+        """Poll the connection status on the event loop, in case a lifecycle call is missed"""
+        while True:
+            self._check_connection()
+            await asyncio.sleep(self.connection_check_interval)
+    
+    def remote_is_up(self):
+        """JRPC-OO lifecycle: a remote has connected"""
+        # The remotes have changed, so resolve the stubs again
+        self._cached_stubs.clear()
+        self._set_connected(True)
+    
+    def remote_disconnected(self, uuid):
+        """JRPC-OO lifecycle: the remote uuid has disconnected"""
+        self._cached_stubs.clear()
+        try:
+            remotes = self.get_remotes() or {}
+            connected = any(remote != uuid for remote in remotes)
+        except Exception as e:
+            self.log(f"Error checking remote connections: {e}")
+            connected = False
+        self._set_connected(connected)
+    
+    def _check_connection(self):
+        """Update the connection status from get_remotes(), returning True if it changed"""
+        return self._set_connected(self._has_remote_connections())
+    
+    def _set_connected(self, connected):
+        """Update the connection status, returning True if it changed"""
+        try:
+            was_connected = self.is_connected
+            self.is_connected = connected
+            
+            # If connection status changed
+            if was_connected != self.is_connected:
+                self._cached_stubs.clear()
+                self._reset_stream()
+                if self.is_connected:
+                    # Connection restored
+                    self._connected_event.set()
+                    self._install_output_wrappers(True)
+                    self.log("Remote connection established - enabling input")
+                    self.io.console.print("[green]Remote connection established - input enabled[/green]")
+                else:
+                    # Connection lost
+                    self._connected_event.clear()
+                    self._install_output_wrappers(False)
+                    self.log("No remote connections - disabling input")
+                    self.io.console.print("[red]No remote connections - input disabled[/red]")
+                    self.io.console.print(f"[yellow]In the webapp, use the server URI : [bold]{self.webapp_url}[/bold][/yellow]")
+                    self.io.console.print("[yellow]If the web app is already running, check its connection[/yellow]")
+                return True
+        except Exception as e:
+            self.log(f"Error in connection monitor: {e}")
+        return False
         
-        # Start the thread
-        thread = threading.Thread(target=check_connection, daemon=True)
-        thread.start()
+    def _install_output_wrappers(self, enabled):
+        """Install the command output wrappers on io, or restore the original methods
         
+        While disconnected the originals are installed, so aider's output doesn't go
+        through the wrappers at all.
+        """
+        if enabled:
+            self.io.tool_output = self.tool_output_wrapper
+            self.io.tool_error = self.tool_error_wrapper
+            self.io.tool_warning = self.tool_warning_wrapper
+            self.io.print = self.print_wrapper
+        else:
+            self.io.tool_output = self.original_tool_output
+            self.io.tool_error = self.original_tool_error
+            self.io.tool_warning = self.original_tool_warning
+            self.io.print = self.original_print
+    
     def _has_remote_connections(self):
         """Check if any remotes are connected"""
         try:
@@ -112,6 +243,14 @@ class IOWrapper(BaseWrapper):
             self.log(f"Error checking remote connections: {e}")
             return False
     
+    def _stub(self, name):
+        """Get the webapp RPC stub for name, resolving it only once per connection"""
+        stub = self._cached_stubs.get(name)
+        if stub is None:
+            stub = self.get_call()[name]
+            self._cached_stubs[name] = stub
+        return stub
+    
     def confirm_ask_wrapper(self, question, default=None, subject=None, explicit_yes_required=False, group=None, allow_never=False):
         """Intercept confirm_ask calls and send to webapp"""
         question_id = (question, subject)
@@ -119,22 +258,29 @@ class IOWrapper(BaseWrapper):
             return False
         
         try:
-            confirmation_data = {
-                'question': str(question) if question is not None else '',
-                'default': default,
-                'subject': str(subject) if subject is not None else None,
-                'explicit_yes_required': explicit_yes_required,
-                'group': str(group) if group is not None else None,
-                'allow_never': allow_never
-            }
+            request = ConfirmationRequest.from_args(
+                question, default, subject, explicit_yes_required, group, allow_never
+            )
+            
+            # Waiting on main_loop from its own thread would deadlock, so only hand
+            # the request to the loop when called from another thread (aider's)
+            try:
+                running_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                running_loop = None
             
             # Use main_loop if available, otherwise fall back to original method
-            if self.main_loop and not self.main_loop.is_closed():
-                future = asyncio.run_coroutine_threadsafe(
-                    self._async_confirmation_request(confirmation_data),
-                    self.main_loop
-                )
-                response = future.result()  # No timeout - wait indefinitely
+            if self.main_loop and not self.main_loop.is_closed() and running_loop is not self.main_loop:
+                # Once "all" or "skip" has been chosen for a ConfirmGroup, aider answers
+                # the rest of the group without asking, so don't ask the webapp either
+                preference = getattr(group, 'preference', None)
+                if preference == 'all' and not explicit_yes_required:
+                    return True
+                if preference == 'skip':
+                    return False
+                
+                future = self._submit(self._async_confirmation_request(request.to_dict()))
+                response = self._wait_for_confirmation(future)
                 if response == "d" and allow_never:
                     self.io.never_prompts.add(question_id)
                     hist = f"{question.strip()} {response}"
@@ -144,16 +290,52 @@ class IOWrapper(BaseWrapper):
                 return response
             else:
                 return self.original_confirm_ask(question, default, subject, explicit_yes_required, group, allow_never)
-                
+        
+        except concurrent.futures.CancelledError:
+            # Shutting down, decline rather than prompting on the console
+            self.log("Confirmation cancelled")
+            return False
         except Exception as e:
             self.log(f"Error in confirm_ask_wrapper: {e}")
             return self.original_confirm_ask(question, default, subject, explicit_yes_required, group, allow_never)
     
+    def _wait_for_confirmation(self, future):
+        """Wait for the webapp's answer to a confirmation request
+        
+        There is no timeout for the user's answer, but the request on main_loop
+        is cancelled rather than orphaned if the webapp disconnects, or by
+        cancel_confirmations when the server shuts down.
+        
+        Raises:
+            ConnectionError: If the webapp disconnected before answering
+            CancelledError: If the request was cancelled by cancel_confirmations
+        """
+        done = threading.Event()
+        future.add_done_callback(lambda f: done.set())
+        self._pending_confirmations.add(future)
+        try:
+            while not done.wait(self.connection_check_interval):
+                if not self.is_connected:
+                    future.cancel()
+                    raise ConnectionError("Webapp disconnected while waiting for confirmation")
+        finally:
+            self._pending_confirmations.discard(future)
+        return future.result()
+    
+    def cancel_confirmations(self):
+        """Cancel confirmation requests still waiting for an answer, called on shutdown
+        
+        Signals are only delivered to the main thread, so Ctrl+C can't interrupt
+        aider's thread while it waits for an answer.
+        """
+        for future in list(self._pending_confirmations):
+            future.cancel()
+    
     async def _async_confirmation_request(self, confirmation_data):
         """Make the async RPC call to the webapp"""
         try:
-            call_func = self.get_call()['MessageHandler.confirmation_request']
-            response = await call_func(confirmation_data)  # No timeout - wait indefinitely
+            call_func = self._stub('MessageHandler.confirmation_request')
+            response = await asyncio.wait_for(call_func(confirmation_data), timeout=self.confirm_timeout)
             # Extract response from dict if needed
             if isinstance(response, dict) and len(response) == 1:
                 response = next(iter(response.values()))
@@ -169,7 +351,7 @@ class IOWrapper(BaseWrapper):
         
         # Send to webapp if connected - fire and forget
         if self.is_connected:
-            self._safe_create_task(self.send_to_webapp(message))
+            self._submit(self.send_to_webapp(message))
         
         # Call original method to maintain console output
         return self.original_assistant_output(message, pretty)
@@ -184,7 +366,10 @@ class IOWrapper(BaseWrapper):
         # Replace with our wrapper
         def update_wrapper(content, final=False):
             # Send to webapp asynchronously - fire and forget
-            self._safe_create_task(self.send_stream_update(content, final))
+            if self.main_loop and not self.main_loop.is_closed():
+                self.main_loop.call_soon_threadsafe(self._buffer_stream_update, content, final)
+            else:
+                self._submit(self.send_stream_update(content, final))
             
             # Call original method with error handling for Rich LiveError
             try:
@@ -202,50 +387,126 @@ class IOWrapper(BaseWrapper):
         mdstream.update = update_wrapper
         return mdstream
         
+    def _buffer_stream_update(self, content, final):
+        """Coalesce streaming updates on main_loop, sending at most one per flush delay
+        
+        Each update carries the whole response so far, so only the latest needs sending.
+        """
+        self._stream_pending = content
+        if final:
+            if self._stream_flush_handle:
+                self._stream_flush_handle.cancel()
+            self._flush_stream(final=True)
+        elif self._stream_flush_handle is None:
+            self._stream_flush_handle = self.main_loop.call_later(self.STREAM_FLUSH_DELAY, self._flush_stream)
+    
+    def _flush_stream(self, final=False):
+        """Send the latest buffered streaming update to the webapp
+        
+        While a previous streamWrite is in flight the update stays buffered, and is
+        sent when that write completes. Newer updates replace it in the meantime, so
+        a slow connection gets fewer, larger updates rather than a growing backlog.
+        """
+        self._stream_flush_handle = None
+        self._stream_pending_final = self._stream_pending_final or final
+        if self._stream_inflight is not None and not self._stream_inflight.done():
+            return
+        
+        content = self._stream_pending
+        final = self._stream_pending_final
+        self._stream_pending = None
+        self._stream_pending_final = False
+        if content is None or not self.is_connected:
+            return
+        
+        try:
+            # Already on main_loop, so no thread-safe submission is needed. The
+            # timeout frees the slot if the webapp never answers
+            self._stream_inflight = asyncio.ensure_future(asyncio.wait_for(
+                self._stub('MessageHandler.streamWrite')(content, final, 'assistant'),
+                timeout=self.STREAM_WRITE_TIMEOUT
+            ))
+        except Exception as e:
+            self.log(f"Error sending stream update to webapp: {e}")
+            return
+        self._stream_inflight.add_done_callback(
+            lambda future: self._on_stream_write_done(future, content, final)
+        )
+    
+    def _on_stream_write_done(self, future, content, final):
+        """Send any update buffered while a streamWrite was in flight"""
+        if future is not self._stream_inflight:
+            # Dropped by _reset_stream
+            return
+        if not future.cancelled() and future.exception():
+            # Repeats for every update while the webapp is unresponsive
+            if Logger.is_enabled('info'):
+                self.log(f"Error sending stream update to webapp: {future.exception()!r}")
+            if isinstance(future.exception(), asyncio.TimeoutError) and self._stream_pending is None:
+                # Nothing newer replaces it, so retry this update
+                self._stream_pending = content
+                self._stream_pending_final = final
+        if self._stream_pending is not None and self._stream_flush_handle is None:
+            self._flush_stream()
+    
+    def _reset_stream(self):
+        """Drop buffered and in-flight streaming updates when the connection changes
+        
+        A write left unanswered by a reload or disconnect would otherwise hold the
+        single in-flight slot and stop all later streaming.
+        """
+        if self._stream_flush_handle:
+            self._stream_flush_handle.cancel()
+            self._stream_flush_handle = None
+        if self._stream_inflight is not None:
+            self._stream_inflight.cancel()
+            self._stream_inflight = None
+        self._stream_pending = None
+        self._stream_pending_final = False
+        
     # Command output wrapper methods
     def tool_output_wrapper(self, message='', **kwargs):
         """Intercept standard informational output"""
-        # Mark that we've seen command output
-        self.has_command_output = True
-        
-        # Send to webapp - fire and forget
-        self._safe_create_task(self.send_to_webapp_command('output', message))
+        # Send to webapp if connected - fire and forget
+        if self.is_connected:
+            self._queue_output('output', message)
         
         # Call original method with all arguments
         return self.original_tool_output(message, **kwargs)
     
     def tool_error_wrapper(self, message='', **kwargs):
         """Intercept error messages"""
-        # Mark that we've seen command output
-        self.has_command_output = True
-        
-        # Send to webapp - fire and forget
-        self._safe_create_task(self.send_to_webapp_command('error', message))
+        # Send to webapp if connected - fire and forget
+        if self.is_connected:
+            self._queue_output('error', message)
         
         # Call original method with all arguments
         return self.original_tool_error(message, **kwargs)
     
     def tool_warning_wrapper(self, message='', **kwargs):
         """Intercept warning messages"""
-        # Mark that we've seen command output
-        self.has_command_output = True
-        
-        # Send to webapp - fire and forget
-        self._safe_create_task(self.send_to_webapp_command('warning', message))
+        # Send to webapp if connected - fire and forget
+        if self.is_connected:
+            self._queue_output('warning', message)
         
         # Call original method with all arguments
         return self.original_tool_warning(message, **kwargs)
     
     def print_wrapper(self, *args, **kwargs):
         """Intercept print calls"""
-        # Convert args to string message
-        message = ' '.join(str(arg) for arg in args)
+        # Without the event loop nothing can reach the webapp
+        if self.main_loop is None or self.main_loop.is_closed():
+            return self.original_print(*args, **kwargs)
         
-        # Mark that we've seen command output
-        self.has_command_output = True
-        
-        # Send to webapp - fire and forget
-        self._safe_create_task(self.send_to_webapp_command('print', message))
+        # Send to webapp if connected - fire and forget. The message is only
+        # built when it will be sent
+        if self.is_connected:
+            # aider almost always prints a single string, which needs no joining
+            if len(args) == 1 and type(args[0]) is str:
+                message = args[0]
+            else:
+                message = ' '.join(map(str, args))
+            self._queue_output('print', message)
         
         # Call original method
         return self.original_print(*args, **kwargs)
@@ -253,19 +514,87 @@ class IOWrapper(BaseWrapper):
     def signal_command_complete(self):
         """Signal that command processing is complete"""
         try:
-            if self.has_command_output:
-                # Reset the flag
-                self.has_command_output = False
-                # Send completion signal
-                self._safe_create_task(self.get_call()['MessageHandler.streamComplete']())
+            # Queued behind any pending output, the drain only sends the completion
+            # if there was output since the last one
+            self._queue_output(None)
         except Exception as e:
             self.log(f"Error in signal_command_complete: {e}")
     
+    def _queue_output(self, msg_type, message=None):
+        """Queue command output for the webapp, or completion if msg_type is None"""
+        if self._output_pending is None or self.main_loop.is_closed():
+            # No event loop to drain the buffer, send directly
+            if msg_type is None:
+                self._submit(self._stub('MessageHandler.streamComplete')())
+            else:
+                self._fire(self.send_to_webapp_command(msg_type, message))
+            return
+        
+        with self._output_lock:
+            if msg_type is not None and len(self._output_pending) >= self.OUTPUT_QUEUE_SIZE:
+                # A full buffer always has a drain scheduled, which reports the count
+                self._output_dropped += 1
+                first_drop = self._output_dropped == 1
+            else:
+                first_drop = None
+                self._output_pending.append((msg_type, message))
+                if self._output_drain_scheduled:
+                    return
+                self._output_drain_scheduled = True
+        
+        if first_drop is None:
+            self.main_loop.call_soon_threadsafe(self._drain_output)
+        elif first_drop:
+            self.log("Command output queue is full, dropping messages")
+    
+    def _drain_output(self):
+        """Send all buffered command output, runs on main_loop"""
+        with self._output_lock:
+            self._output_drain_scheduled = False
+            batch = list(self._output_pending)
+            self._output_pending.clear()
+            dropped = self._output_dropped
+            self._output_dropped = 0
+        
+        if dropped:
+            self.log(f"Command output queue drained, {dropped} messages were dropped")
+        
+        try:
+            for start in range(0, len(batch), self.OUTPUT_BATCH_SIZE):
+                self._send_output_batch(batch[start:start + self.OUTPUT_BATCH_SIZE])
+        except Exception as e:
+            self.log(f"Error sending command output to webapp: {e}")
+    
+    def _send_output_batch(self, batch):
+        """Send a batch of queued command output, keeping completions in order"""
+        entries = []
+        for msg_type, message in batch:
+            if msg_type is not None:
+                entries.append((msg_type, str(message)))
+                continue
+            # Completion must not overtake the output queued before it
+            if entries:
+                self._write_command_entries(entries)
+                entries = []
+            if self._output_since_complete:
+                self._output_since_complete = False
+                asyncio.ensure_future(self._stub('MessageHandler.streamComplete')())
+        if entries:
+            self._write_command_entries(entries)
+    
+    def _write_command_entries(self, entries):
+        """Send (type, message) command output entries to the webapp in a single streamWrite"""
+        self._output_since_complete = True
+        if not self.is_connected:
+            return
+        asyncio.ensure_future(self._stub('MessageHandler.streamWrite')(entries, False, 'command'))
+    
     async def send_to_webapp(self, message):
         """Send completed response to webapp - OPTIMIZED VERSION"""
         try:
-            # Fire and forget - don't wait for response
-            self._safe_create_task(self.get_call()['MessageHandler.streamWrite'](message, True, 'assistant'))
+            # Fire and forget - don't wait for response. This runs on main_loop,
+            # so the call is scheduled directly rather than through _submit
+            asyncio.ensure_future(self._stub('MessageHandler.streamWrite')(message, True, 'assistant'))
             
         except Exception as e:
             err_msg = f"Error sending to webapp: {e}"
@@ -273,7 +602,7 @@ class IOWrapper(BaseWrapper):
             
             # Try to notify the webapp about the error - fire and forget
             try:
-                self._safe_create_task(self.get_call()['MessageHandler.streamError'](str(e)))
+                asyncio.ensure_future(self._stub('MessageHandler.streamError')(str(e)))
             except Exception as e2:
                 self.log(f"Failed to send error notification: {e2}")
     
@@ -284,7 +613,7 @@ class IOWrapper(BaseWrapper):
             
         try:
             # Fire and forget - don't wait for response
-            self._safe_create_task(self.get_call()['MessageHandler.streamWrite'](content, final, 'assistant'))
+            asyncio.ensure_future(self._stub('MessageHandler.streamWrite')(content, final, 'assistant'))
             
         except Exception as e:
             err_msg = f"Error sending stream update to webapp: {e}"
@@ -292,7 +621,7 @@ class IOWrapper(BaseWrapper):
             
             # Try to notify the webapp about the error - fire and forget
             try:
-                self._safe_create_task(self.get_call()['MessageHandler.streamError'](str(e)))
+                asyncio.ensure_future(self._stub('MessageHandler.streamError')(str(e)))
             except Exception as e2:
                 self.log(f"Failed to send error notification: {e2}")
                 
@@ -302,12 +631,12 @@ class IOWrapper(BaseWrapper):
             return
             
         try:
-            # Format the message with type prefix for parsing in JavaScript
-            formatted_message = f"{msg_type}:{message}"
+            # Send a list of (type, message) entries, formatted by MessageHandler
+            entries = [(msg_type, str(message))]
             
             # Fire and forget - don't wait for response
             # Use streamWrite with 'command' role instead of displayCommandOutput
-            self._safe_create_task(self.get_call()['MessageHandler.streamWrite'](formatted_message, False, 'command'))
+            asyncio.ensure_future(self._stub('MessageHandler.streamWrite')(entries, False, 'command'))
         except Exception as e:
             err_msg = f"Error sending command output to webapp (if you're exiting, ctl-c again please): {e}"
             self.log(f"{err_msg}\n{type(e)}")
@@ -330,11 +659,11 @@ class IOWrapper(BaseWrapper):
                 self.io.console.print(f"[yellow]In your application use the Server URI : [bold]{self.webapp_url}[/bold][/yellow]")
                 self.io.console.print("[yellow]Waiting for connection... (Press Ctrl+C to exit)[/yellow]")
             
-                # Wait for connection to be restored, checking periodically
-                while not self.is_connected:
+                # Wait for the connection monitor to signal the connection is restored.
+                # The wait is done in slices so Ctrl+C is still handled
+                while not self._connected_event.is_set():
                     try:
-                        # Sleep to avoid high CPU usage and repeated prints
-                        time.sleep(3)
+                        self._connected_event.wait(1.0)
                     except KeyboardInterrupt:
                         # Allow exit with Ctrl+C
                         self.io.console.print("[yellow]Keyboard interrupt detected, exiting...[/yellow]")
@@ -1,29 +1,102 @@
+import atexit
 import logging
 import os
-from datetime import datetime
-import inspect
-import traceback
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+class _FileRouter(logging.Handler):
+    """Passes each record to the file handler registered for its logger name"""
+    
+    def __init__(self):
+        super().__init__()
+        self.handlers = {}
+    
+    def emit(self, record):
+        name = record.name
+        # Records from child loggers go to the file of their nearest registered parent
+        while name not in self.handlers and '.' in name:
+            name = name.rsplit('.', 1)[0]
+        handler = self.handlers.get(name)
+        if handler is not None:
+            handler.handle(record)
+    
+    def close(self):
+        for handler in self.handlers.values():
+            handler.close()
+        super().close()
 
 class Logger:
     """Centralized logger for the application."""
     
     _loggers = {}  # Cache of logger instances
+    # All loggers queue their records here, a single background thread writes
+    # them to the file of each logger
+    _queue = queue.SimpleQueue()
+    _router = _FileRouter()
+    _listener = None
+    _listener_lock = threading.Lock()
     DEFAULT_LOG_DIR = '/tmp'
     DEFAULT_LOGGER_NAME = 'app'
     
+    _LEVELS = {
+        'debug': logging.DEBUG,
+        'info': logging.INFO,
+        'warning': logging.WARNING,
+        'error': logging.ERROR,
+        'critical': logging.CRITICAL
+    }
+    # Lowest level written to the log files, can be set with EHIDE_LOG_LEVEL.
+    # Unknown level names default to info, here and in _level_number
+    LEVEL = _LEVELS.get(os.environ.get('EHIDE_LOG_LEVEL', 'debug').lower(), logging.INFO)
+    
+    @classmethod
+    def _level_number(cls, level):
+        """Get the logging level for a level name, unknown names default to info"""
+        return cls._LEVELS.get(level.lower(), logging.INFO)
+    
     @classmethod
-    def configure(cls, log_dir=None, default_name=None):
+    def configure(cls, log_dir=None, default_name=None, level=None):
         """Configure global logger settings
         
         Args:
             log_dir (str): Directory to store log files
             default_name (str): Default logger name when none specified
+            level (str): Lowest level to log (debug, info, warning, error, critical)
         """
         if log_dir:
             cls.DEFAULT_LOG_DIR = log_dir
             
         if default_name:
             cls.DEFAULT_LOGGER_NAME = default_name
+        
+        if level:
+            cls.LEVEL = cls._level_number(level)
+            for logger in cls._loggers.values():
+                logger.setLevel(cls.LEVEL)
+        
+        cls._start_listener()
+    
+    @classmethod
+    def _start_listener(cls):
+        """Start the background thread writing queued records, if not running"""
+        with cls._listener_lock:
+            if cls._listener is None:
+                cls._listener = QueueListener(cls._queue, cls._router)
+                cls._listener.start()
+    
+    @classmethod
+    def is_enabled(cls, level='debug'):
+        """Check if messages at level are logged, so building them can be skipped if not
+        
+        Args:
+            level (str): Log level (debug, info, warning, error, critical)
+            
+        Returns:
+            bool: True if messages at this level are written
+        """
+        return cls._level_number(level) >= cls.LEVEL
     
     @classmethod
     def get_logger(cls, name=None, log_file=None):
@@ -38,22 +111,28 @@ class Logger:
         """
         # If name is not provided, try to determine it from the calling class
         if name is None:
-            # Walk up the stack to find a reasonable logger name
-            stack = inspect.stack()
+            # Walk up the stack to find a reasonable logger name. Frames are followed
+            # directly, as inspect.stack() would also read source lines for each one
+            try:
+                # Start from 2 to skip this function and its caller
+                frame = sys._getframe(2)
+            except ValueError:
+                frame = None
             
-            # Start from 2 to skip this function and its caller
-            for frame_info in stack[2:]:
+            while frame is not None:
                 # Try to get self argument from locals
-                local_self = frame_info.frame.f_locals.get('self')
+                local_self = frame.f_locals.get('self')
                 if local_self is not None:
                     name = local_self.__class__.__name__
                     break
                 
                 # Try the module name
-                module_name = frame_info.frame.f_globals.get('__name__')
+                module_name = frame.f_globals.get('__name__')
                 if module_name and module_name != '__main__':
                     name = module_name.split('.')[-1]  # Take the last part of the module name
                     break
+                
+                frame = frame.f_back
             
             # If we still don't have a name, use the default
             if name is None:
@@ -65,7 +144,7 @@ class Logger:
         
         # Create a new logger
         logger = logging.getLogger(name)
-        logger.setLevel(logging.DEBUG)
+        logger.setLevel(cls.LEVEL)
         
         # Determine log file if not provided
         if log_file is None:
@@ -86,8 +165,12 @@ class Logger:
         file_handler.setFormatter(formatter)
         console_handler.setFormatter(formatter)
         
+        # File writes are done by the shared background thread, callers only queue the record
+        cls._router.handlers[name] = file_handler
+        cls._start_listener()
+        
         # Add the handlers to the logger
-        logger.addHandler(file_handler)
+        logger.addHandler(QueueHandler(cls._queue))
         logger.addHandler(console_handler)
         
         # Store in cache
@@ -107,39 +190,38 @@ class Logger:
         """
         logger = cls.get_logger(name, log_file)
         
-        level = level.lower()
-        if level == 'debug':
-            logger.debug(message)
-        elif level == 'info':
-            logger.info(message)
-        elif level == 'warning':
-            logger.warning(message)
-        elif level == 'error':
-            logger.error(message)
-        elif level == 'critical':
-            logger.critical(message)
-        else:
-            logger.info(message)  # Default to info level
+        # Unknown levels default to info
+        logger.log(cls._level_number(level), message)
             
+    # The level helpers call the logging method directly rather than going
+    # through log(), which saves the level lookup and an extra call per message
     @classmethod
     def debug(cls, message, name=None, log_file=None):
-        cls.log(message, 'debug', name, log_file)
+        cls.get_logger(name, log_file).debug(message)
         
     @classmethod
     def info(cls, message, name=None, log_file=None):
-        cls.log(message, 'info', name, log_file)
+        cls.get_logger(name, log_file).info(message)
         
     @classmethod
     def warning(cls, message, name=None, log_file=None):
-        cls.log(message, 'warning', name, log_file)
+        cls.get_logger(name, log_file).warning(message)
         
     @classmethod
     def error(cls, message, name=None, log_file=None):
-        cls.log(message, 'error', name, log_file)
+        cls.get_logger(name, log_file).error(message)
         
     @classmethod
     def critical(cls, message, name=None, log_file=None):
-        cls.log(message, 'critical', name, log_file)
+        cls.get_logger(name, log_file).critical(message)
+    
+    @classmethod
+    def shutdown(cls):
+        """Stop the background log writer once its queued records are written"""
+        with cls._listener_lock:
+            if cls._listener is not None:
+                cls._listener.stop()
+                cls._listener = None
     
     @classmethod
     def register_class(cls, class_instance, log_file=None):
@@ -157,3 +239,6 @@ class Logger:
         # Create and cache logger for this class
         cls.get_logger(class_name, log_file)
         return True
+
+# Write out any queued log records before the interpreter exits
+atexit.register(Logger.shutdown)
@@ -8,18 +8,39 @@ try:
     from .port_utils import find_available_port
     from .server_config import ServerConfig
     from .exceptions import ProcessError, LSPError, create_error_response
+    from .logger import Logger
 except ImportError:
     from process_manager import LSPProcessManager
     from port_utils import find_available_port
     from server_config import ServerConfig
     from exceptions import ProcessError, LSPError, create_error_response
+    from logger import Logger
 
-lsp_manager = None
-
-def start_lsp_server(config: ServerConfig, repo=None):
-    """Start the LSP server using configuration and return its port"""
-    global lsp_manager
+class LSPServerRegistry:
+    """Keeps track of the LSP process manager for this process"""
+    
+    def __init__(self):
+        self.manager = None
     
+    def register(self, manager):
+        """Record the manager of a newly started LSP server"""
+        self.manager = manager
+    
+    def cleanup(self):
+        """Stop the registered LSP server, if any"""
+        manager, self.manager = self.manager, None
+        if manager:
+            manager.cleanup()
+
+lsp_registry = LSPServerRegistry()
+
+def start_lsp_server(config: ServerConfig, repo=None, listen_socket=None, *, auto_port=False):
+    """Start the LSP server using configuration and return its port
+
+    If listen_socket is given it must already be bound to the configured port;
+    the LSP server inherits it instead of binding the port itself. With
+    auto_port, a free port is found when none has been allocated yet.
+    """
     try:
         if not config.is_lsp_enabled():
             return None
@@ -29,7 +50,9 @@ def start_lsp_server(config: ServerConfig, repo=None):
         
         # Use the port from config (which should already be allocated)
         if lsp_port is None:
-            raise LSPError("No LSP port allocated")
+            if not auto_port:
+                raise LSPError("No LSP port allocated")
+            lsp_port = find_available_port(config.aider_port + 100)
         
         # Get workspace root from repo if available
         workspace_root = lsp_config['workspace_root']  # fallback to config default
@@ -40,16 +63,18 @@ def start_lsp_server(config: ServerConfig, repo=None):
                     workspace_root = repo_root
                 elif isinstance(repo_root, dict) and 'error' in repo_root:
                     # Handle error response from repo
-                    print(f"LSP Python: Error getting repo root: {repo_root['error']}")
+                    Logger.warning(f"Error getting repo root: {repo_root['error']}")
             except Exception as e:
-                print(f"LSP Python: Error getting repo root: {e}")
+                Logger.warning(f"Error getting repo root: {e}")
         
         lsp_manager = LSPProcessManager(
             lsp_config['webapp_dir'], 
             lsp_port, 
-            workspace_root
+            workspace_root,
+            listen_socket
         )
         
+        lsp_registry.register(lsp_manager)
         actual_port = lsp_manager.start_lsp_server()
         if actual_port:
             config.update_actual_ports(lsp_port=actual_port)
@@ -58,21 +83,17 @@ def start_lsp_server(config: ServerConfig, repo=None):
         
     except ProcessError as e:
         # LSP is optional, so we don't raise but return None
-        print(f"LSP server failed to start: {e}")
+        Logger.error(f"LSP server failed to start: {e}")
         return None
     except Exception as e:
         # LSP is optional, so we don't raise but return None
-        print(f"Unexpected error starting LSP server: {e}")
+        Logger.error(f"Unexpected error starting LSP server: {e}")
         return None
 
 def cleanup_lsp_process():
     """Clean up the LSP process"""
-    global lsp_manager
-    if lsp_manager:
-        try:
-            lsp_manager.cleanup()
-        except Exception as e:
-            # Log but don't raise during cleanup
-            print(f"Error during LSP cleanup: {e}")
-        finally:
-            lsp_manager = None
+    try:
+        lsp_registry.cleanup()
+    except Exception as e:
+        # Log but don't raise during cleanup
+        Logger.error(f"Error during LSP cleanup: {e}")
@@ -3,18 +3,44 @@
 port_utils.py - Shared utilities for port management
 """
 import socket
+import time
 
-def is_port_in_use(port):
-    """Check if a port is already in use"""
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        try:
-            s.bind(('localhost', port))
-            return False
-        except OSError:
+def is_port_in_use(port, timeout=0.05):
+    """Check if a server is accepting connections on a local port"""
+    try:
+        with socket.create_connection(('localhost', port), timeout=timeout):
             return True
+    except OSError:
+        return False
+
+def wait_for_port(port, timeout=10.0, process=None, interval=0.05):
+    """Wait until something accepts connections on port
+
+    Returns False if the timeout passes first, or if the given process exits
+    while waiting, so a crashed server is reported without sitting out the
+    whole timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if is_port_in_use(port, interval):
+            return True
+        if process is not None and process.poll() is not None:
+            return False
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+
+def find_available_port(start_port=None, max_attempts=1000):
+    """Find an available port starting from start_port
 
-def find_available_port(start_port=8999, max_attempts=1000):
-    """Find an available port starting from start_port"""
+    Without a start_port the kernel picks a free port, which takes one bind
+    instead of probing a range.
+    """
+    if start_port is None:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(('', 0))
+            return s.getsockname()[1]
+    
     for port in range(start_port, start_port + max_attempts):
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
             try:
@@ -23,3 +49,24 @@ def find_available_port(start_port=8999, max_attempts=1000):
             except OSError:
                 continue
     raise RuntimeError(f"Could not find an available port in range {start_port}-{start_port + max_attempts}")
+
+
+def reserve_port(start_port=None, max_attempts=1000):
+    """Bind and listen on the first available port from start_port.
+
+    Returns the listening socket rather than the port number, so nothing can
+    take the port before the process that serves it inherits the socket.
+    Without a start_port the kernel picks the port.
+    """
+    kwargs = {}
+    if socket.has_dualstack_ipv6():
+        kwargs = {'family': socket.AF_INET6, 'dualstack_ipv6': True}
+    if start_port is None:
+        return socket.create_server(('', 0), **kwargs)
+    
+    for port in range(start_port, start_port + max_attempts):
+        try:
+            return socket.create_server(('', port), **kwargs)
+        except OSError:
+            continue
+    raise RuntimeError(f"Could not find an available port in range {start_port}-{start_port + max_attempts}")
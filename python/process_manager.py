@@ -3,6 +3,8 @@
 process_manager.py - Simplified process management utilities
 """
 import os
+import selectors
+import signal
 import subprocess
 import time
 import threading
@@ -13,6 +15,25 @@ try:
 except ImportError:
     from exceptions import ProcessError
 
+# Package directories already found to have a package.json
+_valid_package_dirs = set()
+
+def _find_missing_package_path(cwd):
+    """Return the first of cwd and its package.json that is missing, or None
+
+    Only directories found complete are remembered, so a missing path is
+    checked again on the next start and can be fixed without a restart.
+    """
+    if cwd in _valid_package_dirs:
+        return None
+    if not os.path.isdir(cwd):
+        return cwd
+    package_json = os.path.join(cwd, 'package.json')
+    if not os.path.isfile(package_json):
+        return package_json
+    _valid_package_dirs.add(cwd)
+    return None
+
 class ProcessManager:
     """Manages external processes with simplified patterns"""
     
@@ -22,6 +43,7 @@ class ProcessManager:
         self.args = args or []
         self.cwd = cwd
         self.env_vars = env_vars or {}
+        self.pass_fds = ()
         self.process = None
     
     def start(self, startup_delay=3, check_port=None):
@@ -37,11 +59,19 @@ class ProcessManager:
                 env=env,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True
+                pass_fds=self.pass_fds,
+                # Own session, so a terminal Ctrl+C reaches only us and cleanup
+                # can stop the whole process tree (npm, its shell and server)
+                start_new_session=True
             )
             
             self._start_logging()
             
+            # With a port to watch, return as soon as it accepts connections
+            # rather than sleeping for a fixed startup delay
+            if check_port:
+                return self._check_port(check_port)
+            
             if startup_delay > 0:
                 time.sleep(startup_delay)
             
@@ -49,9 +79,6 @@ class ProcessManager:
                 print(f"{self.name}: Failed to start")
                 raise ProcessError(f"{self.name} failed to start")
                 
-            if check_port:
-                return self._check_port(check_port)
-                
             return True
                 
         except FileNotFoundError:
@@ -63,49 +90,76 @@ class ProcessManager:
             print(error_msg)
             raise ProcessError(error_msg)
     
-    def _check_port(self, port):
-        """Check if process is listening on port"""
+    def _check_port(self, port, timeout=10):
+        """Wait for the process to listen on port"""
         try:
-            from .port_utils import is_port_in_use
+            from .port_utils import wait_for_port
         except ImportError:
-            from port_utils import is_port_in_use
+            from port_utils import wait_for_port
         
-        for _ in range(2):  # Try twice
-            if is_port_in_use(port):
-                return True
-            time.sleep(2)
+        if wait_for_port(port, timeout, self.process):
+            return True
+        
+        if not self.is_running():
+            print(f"{self.name}: Failed to start")
+            raise ProcessError(f"{self.name} failed to start")
         
         error_msg = f"{self.name}: Failed to bind to port {port}"
         print(error_msg)
         raise ProcessError(error_msg)
     
     def _start_logging(self):
-        """Start logging threads for stdout/stderr"""
-        for stream, label in [(self.process.stdout, 'OUT'), (self.process.stderr, 'ERR')]:
-            thread = threading.Thread(
-                target=lambda s, l: [print(f"[{self.name}-{l}] {line.strip()}") 
-                                    for line in iter(s.readline, '')],
-                args=(stream, label),
-                daemon=True
-            )
-            thread.start()
+        """Start a logging thread for stdout/stderr"""
+        thread = threading.Thread(
+            target=self._log_output,
+            args=(self.process,),
+            daemon=True
+        )
+        thread.start()
+    
+    def _log_output(self, process):
+        """Print the output of both pipes line by line, reading them from one thread"""
+        with selectors.DefaultSelector() as selector:
+            for stream, label in [(process.stdout, 'OUT'), (process.stderr, 'ERR')]:
+                # data holds the label and any partial line read so far
+                selector.register(stream.fileno(), selectors.EVENT_READ, [label, b''])
+            
+            while selector.get_map():
+                for key, _ in selector.select():
+                    label, pending = key.data
+                    chunk = os.read(key.fd, 65536)
+                    if chunk:
+                        *lines, key.data[1] = (pending + chunk).split(b'\n')
+                    else:
+                        # EOF, print what is left and stop watching this pipe
+                        selector.unregister(key.fd)
+                        lines = [pending] if pending else []
+                    for line in lines:
+                        print(f"[{self.name}-{label}] {line.decode(errors='replace').strip()}")
     
     def is_running(self):
         """Check if process is running"""
         return self.process and self.process.poll() is None
     
+    def _signal_group(self, sig):
+        """Send sig to the process and everything it started in its session"""
+        try:
+            os.killpg(self.process.pid, sig)
+        except ProcessLookupError:
+            pass
+    
     def cleanup(self, timeout=5):
         """Clean up the process"""
         if not self.is_running():
             return
         
         try:
-            self.process.terminate()
+            self._signal_group(signal.SIGTERM)
             self.process.wait(timeout=timeout)
         except subprocess.TimeoutExpired:
             print(f"{self.name}: Force killing...")
             try:
-                self.process.kill()
+                self._signal_group(signal.SIGKILL)
                 self.process.wait(timeout=2)
             except Exception as e:
                 print(f"{self.name}: Failed to kill process: {e}")
@@ -122,6 +176,14 @@ class NPMProcessManager(ProcessManager):
         super().__init__(name, 'npm', ['run', script], cwd, env_vars)
         self.port = port
     
+    def check_package_dir(self):
+        """Raise ProcessError if the npm package directory or its package.json is missing"""
+        missing = _find_missing_package_path(self.cwd)
+        if missing:
+            error_msg = f"{self.name}: Missing {missing}"
+            print(error_msg)
+            raise ProcessError(error_msg)
+    
     def start_with_port_check(self, startup_delay=3):
         """Start npm process and check port"""
         if not self.port:
@@ -149,11 +211,7 @@ class WebappProcessManager(NPMProcessManager):
     
     def start_dev_server(self):
         """Start the webapp development server"""
-        for path in [self.cwd, os.path.join(self.cwd, 'package.json')]:
-            if not os.path.exists(path):
-                error_msg = f"{self.name}: Missing {path}"
-                print(error_msg)
-                raise ProcessError(error_msg)
+        self.check_package_dir()
         
         try:
             return self.start_with_port_check()
@@ -164,20 +222,34 @@ class WebappProcessManager(NPMProcessManager):
 class LSPProcessManager(NPMProcessManager):
     """LSP server manager"""
     
-    def __init__(self, webapp_dir, lsp_port, workspace_root):
+    def __init__(self, webapp_dir, lsp_port, workspace_root, listen_socket=None):
         super().__init__("LSP Server", 'lsp', webapp_dir, lsp_port)
         self.env_vars['WORKSPACE_ROOT'] = workspace_root
+        self.listen_socket = listen_socket
+        
+        if listen_socket is not None:
+            # npm does not forward inherited descriptors, so run the server directly
+            self.command = 'node'
+            self.args = [os.path.join('lsp-server', 'server.js')]
+            self.env_vars['LSP_FD'] = str(listen_socket.fileno())
+            self.pass_fds = (listen_socket.fileno(),)
     
     def start_lsp_server(self):
         """Start the LSP server"""
-        for path in [self.cwd, os.path.join(self.cwd, 'package.json')]:
-            if not os.path.exists(path):
-                error_msg = f"{self.name}: Missing {path}"
-                print(error_msg)
-                raise ProcessError(error_msg)
+        self.check_package_dir()
         
         try:
-            success = self.start_with_port_check()
+            if self.listen_socket is None:
+                success = self.start_with_port_check()
+            else:
+                # The port is already bound to our socket, so there is nothing
+                # to race for or probe; the child now owns the only copy we need
+                # Clients queue on the socket until the server accepts them,
+                # so there is no readiness to wait for
+                try:
+                    success = self.start(startup_delay=0)
+                finally:
+                    self.listen_socket.close()
             return self.port if success else None
         except ProcessError:
             # Return None instead of re-raising for LSP (optional component)
@@ -300,6 +300,10 @@ class Repo(BaseWrapper):
     def abort_rebase(self):
         """Abort the current rebase"""
         return self.git_operations.abort_rebase()
+
+    def get_rebase_operation_result(self, operation_id):
+        """Get the result of a background rebase command"""
+        return self.git_operations.get_rebase_operation_result(operation_id)
     
     # Search methods - delegate to git_search        
     def search_files(self, query, word=False, regex=False, respect_gitignore=True, ignore_case=False):
@@ -8,6 +8,11 @@ import sys
 from dataclasses import dataclass, field
 from typing import Optional, List, Dict, Any
 
+# Paths derived from this file's location, computed once at import
+_PYTHON_DIR = os.path.dirname(os.path.abspath(__file__))
+_REPO_ROOT = os.path.dirname(_PYTHON_DIR)
+_WEBAPP_DIR = os.path.join(_REPO_ROOT, 'webapp')
+
 @dataclass
 class ServerConfig:
     """Centralized configuration for all server components"""
@@ -21,6 +26,10 @@ class ServerConfig:
     no_browser: bool = False
     no_lsp: bool = False
     
+    # Event loop implementation ('asyncio' or 'uvloop')
+    event_loop: str = 'asyncio'
+    eager_tasks: bool = False
+    
     # Aider arguments (passed through)
     aider_args: List[str] = field(default_factory=list)
     
@@ -35,12 +44,9 @@ class ServerConfig:
     
     def __post_init__(self):
         """Initialize derived paths after object creation"""
-        # Set repo root to parent of python directory
-        python_dir = os.path.dirname(__file__)
-        self.repo_root = os.path.dirname(python_dir)
-        
-        # Set webapp directory
-        self.webapp_dir = os.path.join(self.repo_root, 'webapp')
+        # Repo root is the parent of the python directory
+        self.repo_root = _REPO_ROOT
+        self.webapp_dir = _WEBAPP_DIR
     
     @classmethod
     def from_args(cls, args: Optional[List[str]] = None) -> 'ServerConfig':
@@ -65,6 +71,12 @@ Examples:
   # Prevent automatic browser opening
   aider-server --no-browser
   
+  # Run on the uvloop event loop (pip install uvloop)
+  aider-server --loop uvloop
+  
+  # Start asyncio tasks eagerly (Python 3.12+)
+  aider-server --eager-tasks
+  
   # Pass Aider arguments (model, API keys, etc.)
   aider-server --model deepseek --api-key deepseek=<your-key>
   aider-server --model gpt-4 --api-key openai=<your-key>
@@ -102,6 +114,17 @@ Examples:
             action="store_true", 
             help="Don't start LSP server"
         )
+        parser.add_argument(
+            "--loop",
+            choices=["asyncio", "uvloop"],
+            default="asyncio",
+            help="Event loop implementation (default: asyncio)"
+        )
+        parser.add_argument(
+            "--eager-tasks",
+            action="store_true",
+            help="Run new asyncio tasks eagerly until their first suspension (Python 3.12+)"
+        )
         
         # Parse known args, leaving the rest for Aider
         parsed_args, unknown_args = parser.parse_known_args(args)
@@ -112,6 +135,8 @@ Examples:
             lsp_port=parsed_args.lsp_port,
             no_browser=parsed_args.no_browser,
             no_lsp=parsed_args.no_lsp,
+            event_loop=parsed_args.loop,
+            eager_tasks=parsed_args.eager_tasks,
             aider_args=unknown_args
         )
     
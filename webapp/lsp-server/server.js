@@ -1,6 +1,7 @@
 #!/usr/bin/env node
 
 const WebSocket = require('ws');
+const http = require('http');
 const { spawn } = require('child_process');
 const net = require('net');
 const path = require('path');
@@ -61,11 +62,19 @@ class LSPServer {
     constructor() {
         this.port = null;
         this.server = null;
+        this.httpServer = null;
         this.languageServerPromises = new Map();
-        this.documents = new Map();
+        // Languages whose server command is not installed, so we stop trying to spawn it
+        this.unavailableLanguages = new Set();
+        // Open documents by URI -> last known version
+        this.documentVersions = new Map();
         this.clients = new Set();
         this.workspaceRoot = process.cwd();
         this.messageId = 1;
+
+        // didChange notifications waiting to be coalesced, keyed by URI
+        this.pendingChanges = new Map();
+        this.changeFlushScheduled = false;
         
         // Initialize URI utilities
         this.uriUtils = new LSPUriUtils(this.workspaceRoot);
@@ -91,6 +100,32 @@ class LSPServer {
                 languageId: 'cpp'
             }
         };
+
+        // Client method -> handler, bound once instead of switching per message
+        this.messageHandlers = new Map([
+            ['initialize', this.handleInitialize.bind(this)],
+            ['initialized', this.handleInitialized.bind(this)],
+            ['textDocument/didOpen', this.handleDidOpenTextDocument.bind(this)],
+            ['textDocument/didChange', this.handleDidChangeTextDocument.bind(this)],
+            ['textDocument/didClose', this.handleDidCloseTextDocument.bind(this)],
+            ['textDocument/completion', this.handleCompletion.bind(this)],
+            ['textDocument/hover', this.handleHover.bind(this)],
+            ['textDocument/definition', this.handleDefinition.bind(this)]
+        ]);
+
+        // Lookup tables so routing a document is a single map access
+        this.extensionMap = new Map();
+        this.languageIdMap = new Map();
+        for (const [key, config] of Object.entries(this.languageConfigs)) {
+            for (const ext of config.extensions) {
+                if (!this.extensionMap.has(ext)) {
+                    this.extensionMap.set(ext, key);
+                }
+            }
+            if (!this.languageIdMap.has(config.languageId)) {
+                this.languageIdMap.set(config.languageId, key);
+            }
+        }
     }
 
     async findAvailablePort(startPort = 9000) {
@@ -140,8 +175,18 @@ class LSPServer {
             // Test language server availability
             await this.testLanguageServers();
 
-            // Create WebSocket server
-            this.server = new WebSocket.Server({ port: this.port });
+            // Create WebSocket server, on the socket inherited from the
+            // parent process when one was passed in
+            if (process.env.LSP_FD) {
+                this.httpServer = http.createServer((req, res) => {
+                    res.writeHead(426, { 'Content-Type': 'text/plain' });
+                    res.end('Upgrade Required');
+                });
+                this.httpServer.listen({ fd: parseInt(process.env.LSP_FD, 10) });
+                this.server = new WebSocket.Server({ server: this.httpServer });
+            } else {
+                this.server = new WebSocket.Server({ port: this.port });
+            }
 
             this.server.on('connection', (ws, req) => {
                 const clientId = `client-${Date.now()}-${Math.random().toString(36).substr(2, 9)}`;
@@ -197,7 +242,8 @@ class LSPServer {
     async testLanguageServers() {
         console.log('Testing language server availability...');
         
-        for (const [langKey, config] of Object.entries(this.languageConfigs)) {
+        // Probe all servers at once so startup waits for the slowest, not the sum
+        await Promise.all(Object.entries(this.languageConfigs).map(async ([langKey, config]) => {
             try {
                 // Test if the command exists
                 const testProcess = spawn(config.command, ['--help'], {
@@ -225,51 +271,30 @@ class LSPServer {
                 console.log(`✓ ${langKey} language server available`);
                 
             } catch (error) {
+                if (error.code === 'ENOENT') {
+                    this.unavailableLanguages.add(langKey);
+                }
                 console.log(`✗ ${langKey} language server NOT available`);
             }
-        }
+        }));
     }
 
     async handleMessage(ws, message) {
         const clientId = ws.clientId || 'unknown';
         
+        const { method, params, id } = message;
+
         // Normalize URI using centralized utility before handling
-        if (message.params && message.params.textDocument && message.params.textDocument.uri) {
-            const originalUri = message.params.textDocument.uri;
-            message.params.textDocument.uri = this.uriUtils.normalizeUriForLSP(originalUri, this.workspaceRoot);
+        const textDocument = params && params.textDocument;
+        if (textDocument && textDocument.uri) {
+            textDocument.uri = this.uriUtils.normalizeUriForLSP(textDocument.uri, this.workspaceRoot);
         }
 
-        const { method, params, id } = message;
-
-        switch (method) {
-            case 'initialize':
-                await this.handleInitialize(ws, params, id);
-                break;
-            case 'initialized':
-                await this.handleInitialized(ws, params);
-                break;
-            case 'textDocument/didOpen':
-                await this.handleDidOpenTextDocument(ws, params);
-                break;
-            case 'textDocument/didChange':
-                await this.handleDidChangeTextDocument(ws, params);
-                break;
-            case 'textDocument/didClose':
-                await this.handleDidCloseTextDocument(ws, params);
-                break;
-            case 'textDocument/completion':
-                await this.handleCompletion(ws, params, id);
-                break;
-            case 'textDocument/hover':
-                await this.handleHover(ws, params, id);
-                break;
-            case 'textDocument/definition':
-                await this.handleDefinition(ws, params, id);
-                break;
-            default:
-                if (id) {
-                    this.sendMethodNotFound(ws, id);
-                }
+        const handler = this.messageHandlers.get(method);
+        if (handler) {
+            await handler(ws, params, id);
+        } else if (id) {
+            this.sendMethodNotFound(ws, id);
         }
     }
 
@@ -311,9 +336,9 @@ class LSPServer {
     async handleDidOpenTextDocument(ws, params) {
         const clientId = ws.clientId || 'unknown';
         const { textDocument } = params;
-        const { uri, languageId, text } = textDocument;
+        const { uri } = textDocument;
 
-        this.documents.set(uri, { uri, languageId, text, version: 1 });
+        this.documentVersions.set(uri, 1);
 
         const languageServer = await this.getLanguageServerForDocument(textDocument);
         if (languageServer) {
@@ -323,29 +348,64 @@ class LSPServer {
 
     async handleDidChangeTextDocument(ws, params) {
         const clientId = ws.clientId || 'unknown';
-        const { textDocument, contentChanges } = params;
+        const { textDocument } = params;
         const { uri } = textDocument;
 
-        const document = this.documents.get(uri);
-        if (document) {
-            document.version = textDocument.version;
-            if (contentChanges.length > 0) {
-                document.text = contentChanges[0].text;
-            }
+        if (this.documentVersions.has(uri)) {
+            this.documentVersions.set(uri, textDocument.version);
 
             const languageServer = await this.getLanguageServerForUri(uri);
             if (languageServer) {
-                this.forwardToLanguageServer(languageServer, 'textDocument/didChange', params);
+                this.queueDidChange(languageServer, params);
             }
         }
     }
 
+    /**
+     * Coalesce didChange notifications for the same document that arrive
+     * within one event loop turn into a single notification
+     */
+    queueDidChange(server, params) {
+        const { textDocument, contentChanges } = params;
+        const pending = this.pendingChanges.get(textDocument.uri);
+
+        if (pending && pending.server === server) {
+            // Changes are applied in order, so appending keeps the result identical
+            pending.params.textDocument = textDocument;
+            pending.params.contentChanges.push(...contentChanges);
+        } else {
+            if (pending) {
+                this.flushPendingChanges();
+            }
+            this.pendingChanges.set(textDocument.uri, {
+                server,
+                params: { textDocument, contentChanges: [...contentChanges] }
+            });
+        }
+
+        if (!this.changeFlushScheduled) {
+            this.changeFlushScheduled = true;
+            setImmediate(() => this.flushPendingChanges());
+        }
+    }
+
+    flushPendingChanges() {
+        this.changeFlushScheduled = false;
+        if (this.pendingChanges.size === 0) return;
+
+        const pending = this.pendingChanges;
+        this.pendingChanges = new Map();
+        for (const { server, params } of pending.values()) {
+            this.forwardToLanguageServer(server, 'textDocument/didChange', params);
+        }
+    }
+
     async handleDidCloseTextDocument(ws, params) {
         const clientId = ws.clientId || 'unknown';
         const { textDocument } = params;
         const { uri } = textDocument;
 
-        this.documents.delete(uri);
+        this.documentVersions.delete(uri);
 
         const languageServer = await this.getLanguageServerForUri(uri);
         if (languageServer) {
@@ -398,7 +458,7 @@ class LSPServer {
     }
 
     async getLanguageServerForUri(uri, languageId = null) {
-        const filePath = uri.replace('file://', '');
+        const filePath = uri.startsWith('file://') ? uri.slice('file://'.length) : uri;
         
         // Handle .orig files by stripping the .orig extension to get the real file type
         let actualFilePath = filePath;
@@ -408,20 +468,13 @@ class LSPServer {
         
         const ext = path.extname(actualFilePath).toLowerCase();
 
-        let langConfig = null;
-        let langKey = null;
+        const langKey = this.extensionMap.get(ext) ||
+            (languageId ? this.languageIdMap.get(languageId) : undefined);
 
-        for (const [key, config] of Object.entries(this.languageConfigs)) {
-            if (config.extensions.includes(ext) || (languageId && config.languageId === languageId)) {
-                langConfig = config;
-                langKey = key;
-                break;
-            }
-        }
-
-        if (!langConfig) {
+        if (!langKey || this.unavailableLanguages.has(langKey)) {
             return null;
         }
+        const langConfig = this.languageConfigs[langKey];
 
         if (!this.languageServerPromises.has(langKey)) {
             console.log(`Starting ${langKey} language server`);
@@ -461,6 +514,9 @@ class LSPServer {
 
                 server.on('error', (error) => {
                     console.error(`Failed to start ${langKey} language server:`, error.message);
+                    if (error.code === 'ENOENT') {
+                        this.unavailableLanguages.add(langKey);
+                    }
                     this.languageServerPromises.delete(langKey);
                     if (server.isInitializing && server.initReject) {
                         server.initReject(error);
@@ -522,14 +578,16 @@ class LSPServer {
                 // Store the init request ID to identify the response
                 server.initRequestId = initMessage.id;
 
-                server.stdin.write(this.createLSPMessage(JSON.stringify(initMessage)));
+                this.writeToLanguageServer(server, initMessage);
 
                 // Set up response handling
                 server.pendingRequests = new Map();
-                server.outputBuffer = '';
+                server.outputBuffer = Buffer.alloc(0);
 
                 server.stdout.on('data', (data) => {
-                    server.outputBuffer += data.toString();
+                    server.outputBuffer = server.outputBuffer.length
+                        ? Buffer.concat([server.outputBuffer, data])
+                        : data;
                     this.processLanguageServerOutput(langKey, server);
                 });
 
@@ -545,28 +603,52 @@ class LSPServer {
         return `Content-Length: ${Buffer.byteLength(content)}\r\n\r\n${content}`;
     }
 
+    writeToLanguageServer(server, message) {
+        // Hold writes until the end of this tick so that frames sent together,
+        // such as a flush of queued didChange notifications, go out in one write
+        if (!server.stdin.writableCorked) {
+            server.stdin.cork();
+            process.nextTick(() => server.stdin.uncork());
+        }
+        server.stdin.write(this.createLSPMessage(JSON.stringify(message)));
+    }
+
     processLanguageServerOutput(langKey, server) {
+        // Work on raw bytes: Content-Length counts bytes, and decoding each
+        // chunk separately could split a multi-byte character.
+        const buffer = server.outputBuffer;
+        let offset = 0;
+
         while (true) {
-            const headerEnd = server.outputBuffer.indexOf('\r\n\r\n');
+            const headerEnd = buffer.indexOf('\r\n\r\n', offset);
             if (headerEnd === -1) break;
 
-            const headers = server.outputBuffer.substring(0, headerEnd);
-            const contentLengthMatch = headers.match(/Content-Length: (\d+)/);
-            
-            if (!contentLengthMatch) {
-                server.outputBuffer = server.outputBuffer.substring(headerEnd + 4);
+            // Content-Length is the only header we use, so read it in place
+            // rather than splitting the header block into lines
+            const lengthStart = buffer.indexOf('Content-Length:', offset);
+            const messageStart = headerEnd + 4;
+
+            if (lengthStart === -1 || lengthStart > headerEnd) {
+                offset = messageStart;
                 continue;
             }
 
-            const contentLength = parseInt(contentLengthMatch[1]);
-            const messageStart = headerEnd + 4;
-            
-            if (server.outputBuffer.length < messageStart + contentLength) {
+            const contentLength = parseInt(
+                buffer.toString('latin1', lengthStart + 15, headerEnd), 10);
+
+            if (!Number.isInteger(contentLength) || contentLength < 0) {
+                console.error(`Invalid LSP header from ${langKey}:`,
+                    buffer.toString('latin1', offset, headerEnd));
+                offset = messageStart;
+                continue;
+            }
+
+            if (buffer.length < messageStart + contentLength) {
                 break; // Wait for more data
             }
 
-            const messageContent = server.outputBuffer.substring(messageStart, messageStart + contentLength);
-            server.outputBuffer = server.outputBuffer.substring(messageStart + contentLength);
+            const messageContent = buffer.toString('utf8', messageStart, messageStart + contentLength);
+            offset = messageStart + contentLength;
 
             try {
                 const message = JSON.parse(messageContent);
@@ -575,6 +657,8 @@ class LSPServer {
                 console.error(`Error parsing LSP message from ${langKey}:`, error);
             }
         }
+
+        server.outputBuffer = offset ? buffer.subarray(offset) : buffer;
     }
 
     handleLanguageServerMessage(langKey, server, message) {
@@ -595,7 +679,7 @@ class LSPServer {
                     params: {}
                 };
                 
-                server.stdin.write(this.createLSPMessage(JSON.stringify(initializedMessage)));
+                this.writeToLanguageServer(server, initializedMessage);
                 
                 // Initialization is successful, resolve the promise with the server process.
                 if (server.initResolve) {
@@ -632,6 +716,11 @@ class LSPServer {
     }
 
     forwardToLanguageServer(server, method, params) {
+        // Anything else must not overtake edits still waiting to be sent
+        if (method !== 'textDocument/didChange') {
+            this.flushPendingChanges();
+        }
+
         if (server && server.stdin && !server.stdin.destroyed) {
             const message = {
                 jsonrpc: '2.0',
@@ -640,7 +729,7 @@ class LSPServer {
             };
 
             try {
-                server.stdin.write(this.createLSPMessage(JSON.stringify(message)));
+                this.writeToLanguageServer(server, message);
             } catch (error) {
                 console.error('Error forwarding to language server:', error);
             }
@@ -648,6 +737,8 @@ class LSPServer {
     }
 
     forwardRequestToLanguageServer(server, method, params, originalId, ws) {
+        this.flushPendingChanges();
+
         if (server && server.stdin && !server.stdin.destroyed) {
             const requestId = this.messageId++;
             const message = {
@@ -664,7 +755,7 @@ class LSPServer {
             server.pendingRequests.set(requestId, { ws, originalId });
 
             try {
-                server.stdin.write(this.createLSPMessage(JSON.stringify(message)));
+                this.writeToLanguageServer(server, message);
             } catch (error) {
                 console.error('Error forwarding request to language server:', error);
                 this.sendError(ws, 'Language server communication error', originalId);
@@ -760,6 +851,10 @@ class LSPServer {
             console.log('Closing WebSocket server...');
             this.server.close();
         }
+
+        if (this.httpServer) {
+            this.httpServer.close();
+        }
     }
 }
 
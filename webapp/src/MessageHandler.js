@@ -215,12 +215,11 @@ export class MessageHandler extends JRPCClient {
     const lastMessage = this.messageHistory[this.messageHistory.length - 1];
     
     if (role === 'command') {
-      // For command role, append to content (with newline if not empty)
-      if (lastMessage.content) {
-        lastMessage.content += '\n' + chunk;
-      } else {
-        lastMessage.content = chunk;
-      }
+      // Command output arrives as a list of [type, message] entries, one per line.
+      // They are kept as entries for CommandsCard to render. A new array is
+      // built so the card sees the change
+      const entries = Array.isArray(chunk) ? chunk : [['output', chunk]];
+      lastMessage.entries = lastMessage.entries ? lastMessage.entries.concat(entries) : entries;
     } else {
       // For other roles, just update the content
       lastMessage.content = chunk;
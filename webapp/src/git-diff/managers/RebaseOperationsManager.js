@@ -69,7 +69,7 @@ export class RebaseOperationsManager {
       const response = await this.view.call['Repo.execute_rebase'](this.view.rebasePlan);
       console.log('GitDiffView: Execute rebase response:', response);
       
-      const data = extractResponseData(response);
+      const data = await this.waitForOperation(extractResponseData(response));
       
       if (data && (data.success === true || (data.success === undefined && !data.error))) {
         if (data.conflicts && data.conflicts.length > 0) {
@@ -113,7 +113,7 @@ export class RebaseOperationsManager {
       
       console.log('GitDiffView: User manually continuing rebase');
       const response = await this.view.call['Repo.continue_rebase']();
-      const data = extractResponseData(response);
+      const data = await this.waitForOperation(extractResponseData(response));
       
       console.log('GitDiffView: Continue rebase response:', data);
       
@@ -168,7 +168,7 @@ Message = `Failed to continue rebase: ${error.message}`;
       this.view.loading = true;
       
       const response = await this.view.call['Repo.abort_rebase']();
-      const data = extractResponseData(response);
+      const data = await this.waitForOperation(extractResponseData(response));
       
       if (data && (data.success === true || (data.success === undefined && !data.error))) {
         this.view.resetRebaseState();
@@ -185,6 +185,16 @@ Message = `Failed to continue rebase: ${error.message}`;
     }
   }
 
+  async waitForOperation(data) {
+    // Rebase commands run in the background on the server - poll until the result is ready
+    while (data && data.pending) {
+      await new Promise(resolve => setTimeout(resolve, 200));
+      const response = await this.view.call['Repo.get_rebase_operation_result'](data.operation_id);
+      data = extractResponseData(response);
+    }
+    return data;
+  }
+
   completeRebase() {
     this.view.resetRebaseState();
     
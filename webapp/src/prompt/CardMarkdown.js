@@ -80,9 +80,16 @@ export class CardMarkdown extends LitElement {
     return processor(this.content);
   }
 
+  /**
+   * Get the card's content as plain text, for copying
+   */
+  getText() {
+    return this.content;
+  }
+
   async copyToClipboard() {
     try {
-      await navigator.clipboard.writeText(this.content);
+      await navigator.clipboard.writeText(this.getText());
       this.showCopySuccess = true;
       
       // Hide success indicator after 2 seconds
@@ -95,7 +102,7 @@ export class CardMarkdown extends LitElement {
       // Fallback for older browsers
       try {
         const textArea = document.createElement('textarea');
-        textArea.value = this.content;
+        textArea.value = this.getText();
         textArea.style.position = 'fixed';
         textArea.style.left = '-999999px';
         textArea.style.top = '-999999px';
@@ -118,7 +125,7 @@ export class CardMarkdown extends LitElement {
   copyToPrompt() {
     // Dispatch a custom event that the PromptView can listen to
     this.dispatchEvent(new CustomEvent('copy-to-prompt', {
-      detail: { content: this.content },
+      detail: { content: this.getText() },
       bubbles: true,
       composed: true
     }));
@@ -201,14 +208,20 @@ export class CardMarkdown extends LitElement {
           </div>
         </div>
         <div class="card-content">
-          ${this.role === 'command' 
-            ? html`<pre>${this.content}</pre>`
-            : unsafeHTML(processedContent)
-          }
+          ${this.renderContent(processedContent)}
         </div>
       </div>
     `;
   }
+
+  /**
+   * Render the body of the card
+   */
+  renderContent(processedContent) {
+    return this.role === 'command'
+      ? html`<pre>${this.content}</pre>`
+      : unsafeHTML(processedContent);
+  }
 }
 
 // Ensure Prism is set up
@@ -5,9 +5,31 @@ import { LitElement, html, css } from 'lit';
 import { CardMarkdown } from './CardMarkdown.js';
 
 export class CommandsCard extends CardMarkdown {
+  static properties = {
+    ...CardMarkdown.properties,
+    entries: { type: Array }, // [type, message] command output entries from IOWrapper
+  };
+
   constructor() {
     super();
     this.role = 'command';
+    this.entries = null;
+  }
+
+  getText() {
+    if (!this.entries) return super.getText();
+    return this.entries.map(([, message]) => message).join('\n');
+  }
+
+  /**
+   * Render live command output entries one per line, styled by type.
+   * Cards from the chat history only have the content string
+   */
+  renderContent(processedContent) {
+    if (!this.entries) return super.renderContent(processedContent);
+    return html`<pre>${this.entries.map(([type, message]) =>
+      html`<span class="command-${type}">${message}</span>\n`
+    )}</pre>`;
   }
 
   static styles = [
@@ -19,6 +41,14 @@ export class CommandsCard extends CardMarkdown {
         font-family: 'Courier New', Courier, monospace;
       }
       
+      .command-error {
+        color: var(--md-sys-color-error, #d32f2f);
+      }
+
+      .command-warning {
+        color: #f57c00;
+      }
+
       /* Ensure code blocks inside command output have horizontal scrolling */
       .command-card pre, .command-card code {
         white-space: pre;
@@ -55,7 +55,7 @@ export function renderPromptView(component) {
                     } else if (message.role === 'assistant') {
                       return html`<assistant-card .content=${message.content}></assistant-card>`;
                     } else if (message.role === 'command') {
-                      return html`<commands-card .content=${message.content}></commands-card>`;
+                      return html`<commands-card .content=${message.content} .entries=${message.entries}></commands-card>`;
                     }
                   }
                 )}